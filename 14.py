@@ -1,21 +1,29 @@
-import pygame
-import random
+import os
 import time
-from anytree import Node
-from collections import deque
-
-pygame.init()
-
-pygame.mixer.init()
-
-wall_sound = pygame.mixer.Sound("wall.mp3")
-path_sound = pygame.mixer.Sound("path.mp3")
-wall_sound.set_volume(0.7)
-path_sound.set_volume(0.7)
-sound_queue = deque()
+import pygame
+from assets import AssetCache, SoundBank
+from audio import CuePlayer
+from compiler import CARDINAL_DIRECTIONS, DIRECTIONS, parse_arrow_key_input
+from game import FAILED, FINAL_LEVEL, HINT_WALL, REACHED, WON, GameState, build_level
+from hud import Hud, Overlay
+from levelpack import LevelPack
+from pipeline import LevelBundle, LevelPipeline
+from profiler import PROFILE_JSON, PROFILE_OVERLAY, profiler
+from render import MazeRenderer
+from replay import LiveSession
+from scheduler import Scheduler
+
+AUDIO_BUFFER = 256
+SILENCE_THRESHOLD = 0.01
+# Both hint cues share one reserved channel so a new hint cuts off the stale one.
+HINT_CHANNEL = 0
+
+sounds = SoundBank({"wall": "wall.mp3", "path": "path.mp3"}, volume=0.7, buffer=AUDIO_BUFFER,
+                   trim_below=SILENCE_THRESHOLD)
+cues = CuePlayer(sounds, {"wall": HINT_CHANNEL, "path": HINT_CHANNEL})
 
 BASE_WIDTH, BASE_HEIGHT = 600, 600
-ROWS, COLS = 6, 6
+MIN_CELL_SIZE = 24
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -24,135 +32,85 @@ GREEN = (0, 255, 0)
 GRAY = (50, 50, 50)
 RED = (255, 0, 0)
 
-DIRECTIONS = {'W': (0, -1),
-              'A': (-1, 0),
-              'S': (0, 1),
-              'D': (1, 0)}
-CARDINAL_DIRECTIONS = {'W': 'N',
-                       'A': 'W',
-                       'S': 'S',
-                       'D': 'E'}
-OPPOSITE = {'N': 'S', 'S': 'N', 'E': 'W', 'W': 'E'}
-
-class IRInstruction:
-    def __init__(self, command, direction, steps=1):
-        self.command = command
-        self.direction = direction
-        self.steps = steps
-
-    def __repr__(self):
-        return f"{self.command}({self.direction}, {self.steps})"
+ENDPOINT_IMAGE = "endpoint.png"
+CHECK_IMAGE = "check.png"
+REVEAL_IMAGE = "reveal.png"
+SPRITE_SHEET = "character.png"
+
+LEVEL_PACK = os.environ.get("MAZE_LEVEL_PACK")
+
+assets = AssetCache()
+screen = None
+font = None
+renderer = None
+level_source = build_level
+
+def setup():
+    global screen, font, renderer, level_source
+    pygame.display.init()
+    pygame.font.init()
+    sounds.load_async()
+    level_source = LevelPack(LEVEL_PACK).load if LEVEL_PACK else build_level
+
+    screen = pygame.display.set_mode((BASE_WIDTH, BASE_HEIGHT + 165))
+    pygame.display.set_caption("隠された迷路")
+    pygame.display.set_icon(pygame.image.load("logo.png"))
+
+    font = pygame.font.Font(None, 36)
+    renderer = MazeRenderer(screen, (BASE_WIDTH, BASE_HEIGHT), BLACK, WHITE, BLACK)
+
+def get_sprite(row, col, cell_size):
+    sprite_sheet = assets.image(SPRITE_SHEET)
+    width, height = sprite_sheet.get_width() // 6, sprite_sheet.get_height() // 5
+    rect = (col * width, row * height, width, height)
+    return assets.sprite(SPRITE_SHEET, rect, (cell_size, cell_size))
+
+def load_animations(cell_size):
+    return {
+        'S': [get_sprite(0, i, cell_size) for i in range(6)],
+        'N': [get_sprite(1, i, cell_size) for i in range(6)],
+        'E': [get_sprite(2, i, cell_size) for i in range(6)],
+        'W': [get_sprite(3, i, cell_size) for i in range(6)],
+        'idle': get_sprite(4, 0, cell_size)
+    }
 
+def warm_assets(cell_size):
+    assets.scaled(ENDPOINT_IMAGE, (cell_size, cell_size))
+    assets.scaled(CHECK_IMAGE, (cell_size // 2, cell_size // 2))
+    assets.scaled(REVEAL_IMAGE, (cell_size // 2, cell_size // 2))
+    return load_animations(cell_size)
 
-screen = pygame.display.set_mode((BASE_WIDTH, BASE_HEIGHT + 165))
+def build_bundle(number, seed):
+    level = level_source(number, seed)
+    cell_size = calculate_cell_size(level.maze.rows, level.maze.cols)
+    animations = warm_assets(cell_size)
+    focus = (int((level.start[0] + 0.5) * cell_size), int((level.start[1] + 0.5) * cell_size))
+    return LevelBundle(level, cell_size, animations, renderer.prepare_layer(level.maze, cell_size, focus))
 
-pygame.display.set_caption("隠された迷路")
-logo = pygame.image.load("logo.png")
-pygame.display.set_icon(logo)
 
-font = pygame.font.Font(None, 36)
+walls_visible = True
+player_pose = None
 
-endpoint_image = pygame.image.load("endpoint.png").convert_alpha()
-check_image = pygame.image.load("check.png").convert_alpha()
-reveal_image = pygame.image.load("reveal.png").convert_alpha()
+FRAME_DELAY = 0.1
+LEVEL_PREVIEW_TIME = 5
+REVEAL_TIME = 3
 
-sprite_sheet = pygame.image.load("character.png").convert_alpha()
-SPRITE_WIDTH = sprite_sheet.get_width() // 6
-SPRITE_HEIGHT = sprite_sheet.get_height() // 5
+def calculate_cell_size(rows, cols):
+    return max(MIN_CELL_SIZE, min(BASE_WIDTH // cols, BASE_HEIGHT // rows))
 
-def get_sprite(row, col):
-    raw_sprite = sprite_sheet.subsurface(pygame.Rect(col * SPRITE_WIDTH, row * SPRITE_HEIGHT, SPRITE_WIDTH, SPRITE_HEIGHT))
-    return pygame.transform.scale(raw_sprite, (CELL_SIZE, CELL_SIZE))
+def player_sprite(x, y, sprite):
+    return sprite, (x * CELL_SIZE, y * CELL_SIZE)
 
+def endpoint_sprite(x, y):
+    scaled_endpoint = assets.scaled(ENDPOINT_IMAGE, (CELL_SIZE, CELL_SIZE))
+    return scaled_endpoint, (x * CELL_SIZE, y * CELL_SIZE)
 
-x = 0
-hint1 = 5
-hint2 = 3
-level = 1
-walls_visible = True
-attempts = 4 + level
 
-def calculate_cell_size(rows, cols):
-    return min(BASE_WIDTH // cols, BASE_HEIGHT // rows)
-
-def generate_maze(rows, cols):
-    maze = [[{'N': True, 'S': True, 'E': True, 'W': True} for _ in range(cols)] for _ in range(rows)]
-
-    stack = []
-    visited = set()
-    current_cell = (0, 0)
-    visited.add(current_cell)
-    stack.append(current_cell)
-
-    def neighbors(cell):
-        x, y = cell
-        possible_neighbors = [
-            ((x, y - 1), 'N', 'S'),
-            ((x, y + 1), 'S', 'N'),
-            ((x - 1, y), 'W', 'E'),
-            ((x + 1, y), 'E', 'W'),
-        ]
-        return [
-            (n_cell, dir1, dir2)
-            for n_cell, dir1, dir2 in possible_neighbors
-            if 0 <= n_cell[0] < cols and 0 <= n_cell[1] < rows and n_cell not in visited
-        ]
-
-    while stack:
-        current_cell = stack[-1]
-        valid_neighbors = neighbors(current_cell)
-
-        if valid_neighbors:
-            chosen_cell, direction, opposite = random.choice(valid_neighbors)
-            x, y = current_cell
-            maze[y][x][direction] = False
-            nx, ny = chosen_cell
-            maze[ny][nx][opposite] = False
-            visited.add(chosen_cell)
-            stack.append(chosen_cell)
-        else:
-            stack.pop()
-
-    return maze
-
-def draw_maze(maze, visible):
-    color = WHITE if visible else BLACK
-    for y in range(len(maze)):
-        for x in range(len(maze[y])):
-            cell = maze[y][x]
-            if cell['N']:
-                pygame.draw.line(screen, color, (x * CELL_SIZE, y * CELL_SIZE),
-                                 ((x + 1) * CELL_SIZE, y * CELL_SIZE), 2)
-            if cell['S']:
-                pygame.draw.line(screen, color, (x * CELL_SIZE, (y + 1) * CELL_SIZE),
-                                 ((x + 1) * CELL_SIZE, (y + 1) * CELL_SIZE), 2)
-            if cell['W']:
-                pygame.draw.line(screen, color, (x * CELL_SIZE, y * CELL_SIZE),
-                                 (x * CELL_SIZE, (y + 1) * CELL_SIZE), 2)
-            if cell['E']:
-                pygame.draw.line(screen, color, ((x + 1) * CELL_SIZE, y * CELL_SIZE),
-                                 ((x + 1) * CELL_SIZE, (y + 1) * CELL_SIZE), 2)
-
-def draw_player(x, y, sprite):
-    screen.blit(sprite, (x * CELL_SIZE, y * CELL_SIZE))
-
-def draw_endpoint(x, y):
-    scaled_endpoint = pygame.transform.scale(endpoint_image, (CELL_SIZE, CELL_SIZE))
-    screen.blit(scaled_endpoint, (x * CELL_SIZE, y * CELL_SIZE))
-
-
-def draw_special_point(x, y, image):
-    if x is not None and y is not None:
-        scaled_image = pygame.transform.scale(image, (CELL_SIZE // 2, CELL_SIZE // 2))
-        offset_x = (CELL_SIZE - CELL_SIZE // 2) // 2
-        offset_y = (CELL_SIZE - CELL_SIZE // 2) // 2
-        screen.blit(scaled_image, (x * CELL_SIZE + offset_x, y * CELL_SIZE + offset_y))
-
-
-def classify_token(token):
-    if token in ["UP", "DOWN", "LEFT", "RIGHT"]:
-        return "DIRECTION"
-    return "UNKNOWN"
+def special_point_sprite(x, y, image):
+    scaled_image = assets.scaled(image, (CELL_SIZE // 2, CELL_SIZE // 2))
+    offset_x = (CELL_SIZE - CELL_SIZE // 2) // 2
+    offset_y = (CELL_SIZE - CELL_SIZE // 2) // 2
+    return scaled_image, (x * CELL_SIZE + offset_x, y * CELL_SIZE + offset_y)
 
 
 def tokenize_arrow_key(key):
@@ -164,342 +122,136 @@ def tokenize_arrow_key(key):
     }
     return key_mapping.get(key, None)
 
-def parse_arrow_key_input(token):
-    if classify_token(token) == "DIRECTION":
-        root = Node("Command")
-        move_node = Node("Move", parent=root)
-        Node(f"Direction: {token}", parent=move_node)
-        return root
-    else:
-        raise ValueError("Invalid token")
-
-def update_animations():
-    global animations
-    animations = {
-        'S': [get_sprite(0, i) for i in range(6)],
-        'N': [get_sprite(1, i) for i in range(6)],
-        'E': [get_sprite(2, i) for i in range(6)],
-        'W': [get_sprite(3, i) for i in range(6)],
-        'idle': get_sprite(4, 0)
-    }
-
-
-def parse_to_ir(command):
-    ir_list = []
-    tokens = list(command.upper())
-
-    root = Node("Command")
-
-    i = 0
-    while i < len(tokens):
-        move = tokens[i]
-        if move in DIRECTIONS:
-            move_node = Node("Move", parent=root)
-            Node(f"Direction: {move}", parent=move_node)
-
-            steps = 1
-            if i + 1 < len(tokens) and tokens[i + 1].isdigit():
-                steps = int(tokens[i + 1])
-                Node(f"Steps: {steps}", parent=move_node)
-                i += 1
-
-            ir_list.append(IRInstruction("MOVE", move, steps))
-        else:
-            print(f"Invalid move: {move}")
-            return None
-        i += 1
-
-    print_parse_tree(root)
-
-    return ir_list
-
-
-def execute_ir(ir_list, player_x, player_y, maze):
-    for instruction in ir_list:
-        if instruction.command == "MOVE":
-            direction = instruction.direction
-            steps = instruction.steps
-            dx, dy = DIRECTIONS[direction]
-
-            for _ in range(steps):
-                new_x, new_y = player_x + dx, player_y + dy
-
-                if 0 <= new_x < len(maze[0]) and 0 <= new_y < len(maze) and not maze[player_y][player_x][CARDINAL_DIRECTIONS[direction]]:
-                    player_x, player_y = new_x, new_y
-                else:
-                    print("Wall encountered!")
-                    break
-
-    return player_x, player_y
-
-def toggle_visibility(x, y, visible):
-    color = WHITE if visible else BLACK
-    pygame.draw.rect(screen, color, (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-def print_parse_tree(node, level=0):
-    indent = " " * (level * 4)
-    print(f"{indent}{node.name}")
-    for child in node.children:
-        print_parse_tree(child, level + 1)
-
-def play_sounds_from_queue():
-    if not pygame.mixer.get_busy() and sound_queue:
-        next_sound = sound_queue.popleft()
-        next_sound.play()
-
-def check_direction(player_x, player_y, direction, maze):
-    global hint1
-    if hint1 <= 0:
+def check_direction(state, direction, requested=None):
+    hint = state.use_hint(direction)
+    if hint is None:
         print("out of clues")
-        return
-    hint1 -= 1
-    dx, dy = DIRECTIONS[direction]
-    cardinal = CARDINAL_DIRECTIONS[direction]
-    new_x, new_y = player_x + dx, player_y + dy
-
-    if not (0 <= new_x < len(maze[0]) and 0 <= new_y < len(maze)):
-        sound_queue.append(wall_sound)
-    elif maze[player_y][player_x][cardinal]:
-        sound_queue.append(wall_sound)
+    elif hint == HINT_WALL:
+        cues.cue("wall", requested)
     else:
-        sound_queue.append(path_sound)
+        cues.cue("path", requested)
 
 
-def process_input_with_animation(player_x, player_y, command, maze):
-    global green_x, green_y, red_x, red_y, hint1, hint2
+def process_input_with_animation(state, moves):
+    global player_pose
     try:
-        ir_list = parse_to_ir(command)
-        if not ir_list:
-            print("No valid commands found in input.")
-            return player_x, player_y, False
-
-        print("Generated IR:", ir_list)
-
-        for instruction in ir_list:
-            if instruction.command == "MOVE":
-                direction = instruction.direction
-                steps = instruction.steps
-                dx, dy = DIRECTIONS[direction]
-
-                for _ in range(steps):
-                    new_x, new_y = player_x + dx, player_y + dy
-
-                    if 0 <= new_x < len(maze[0]) and 0 <= new_y < len(maze) and not maze[player_y][player_x][CARDINAL_DIRECTIONS[direction]]:
-                        steps_animation = len(animations[CARDINAL_DIRECTIONS[direction]])
-                        step_dx = dx * (CELL_SIZE / steps_animation)
-                        step_dy = dy * (CELL_SIZE / steps_animation)
-
-                        current_x, current_y = player_x * CELL_SIZE, player_y * CELL_SIZE
-                        for frame in animations[CARDINAL_DIRECTIONS[direction]]:
-                            current_x += step_dx
-                            current_y += step_dy
-                            toggle_visibility(player_x, player_y, visible=False)
-                            draw_player(current_x / CELL_SIZE, current_y / CELL_SIZE, frame)
-                            pygame.display.flip()
-                            time.sleep(0.1)
-
-                        player_x, player_y = new_x, new_y
-                        toggle_visibility(player_x, player_y, visible=True)
-
-                        if (player_x, player_y) == (green_x, green_y):
-                            hint1 += 1
-                            green_x, green_y = None, None
-                            print("You collected the green circle! Hint1 increased.")
-
-                        if (player_x, player_y) == (red_x, red_y):
-                            hint2 += 1
-                            red_x, red_y = None, None
-                            print("You collected the red circle! Hint2 increased.")
-
-                        if (player_x, player_y) == (end_x, end_y):
-                            return player_x, player_y, True
-
-                    else:
-                        print("Wall encountered!")
-                        break
-
-        draw_player(player_x, player_y, animations['idle'])
-        pygame.display.flip()
-
-        success = (player_x, player_y) == (end_x, end_y)
-        return player_x, player_y, success
+        while True:
+            try:
+                with profiler.section("move_step"):
+                    direction = next(moves)
+            except StopIteration as stop:
+                return stop.value
+
+            x, y = state.player
+            dx, dy = DIRECTIONS[direction]
+            frames = animations[CARDINAL_DIRECTIONS[direction]]
+            for i, frame in enumerate(frames, 1):
+                progress = i / len(frames)
+                player_pose = (x + dx * progress, y + dy * progress, frame)
+                yield FRAME_DELAY
+            player_pose = None
+            renderer.reveal_cell(x + dx, y + dy)
     except Exception as e:
         print(f"Error processing input: {e}")
-        return player_x, player_y, False
-
-def main():
-    global level, x, hint1, hint2, walls_visible, CELL_SIZE, attempts, animations, green_x, green_y, red_x, red_y, end_x, end_y
-
-    level = 1
-    x = 0
-
-    maze = generate_maze(ROWS + x, COLS + x)
-    CELL_SIZE = calculate_cell_size(ROWS + x, COLS + x)
-
-    # Generate animation frames
-    animations = {
-        'S': [get_sprite(0, i) for i in range(6)],
-        'N': [get_sprite(1, i) for i in range(6)],
-        'E': [get_sprite(2, i) for i in range(6)],
-        'W': [get_sprite(3, i) for i in range(6)],
-        'idle': get_sprite(4, 0)
-    }
-    end_x, end_y = random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)
-
-    red_x, red_y = (random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)) if random.randint(1,3) == 1 else (None, None)
-    green_x, green_y = (random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)) if random.randint(1,5) == 1 else (None, None)
-
-    start_x, start_y = random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)
-    while (start_x == end_x and start_y == end_y) or (start_x == green_x and start_y == green_y) or (
-            start_x == red_x and start_y == red_y):
-        start_x, start_y = random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)
-
-    player_x, player_y = start_x, start_y
-    clock = pygame.time.Clock()
+        return None
+    finally:
+        player_pose = None
+
+def main(session=None):
+    setup()
+    if session is None:
+        session = LiveSession()
+    pipeline = LevelPipeline(build_bundle)
+    bundle = None
+
+    def load_prepared(number, seed):
+        nonlocal bundle
+        bundle = pipeline.take(number, seed)
+        return bundle.level
+
+    state = GameState(seed=session.seed, log=print, loader=load_prepared)
+    scheduler = Scheduler()
+
+    def load_level():
+        global CELL_SIZE, animations
+        CELL_SIZE = bundle.cell_size
+        animations = bundle.animations
+        renderer.reset(state.maze, CELL_SIZE, layer=bundle.layer)
+        renderer.reveal_cell(*state.player)
+        if state.level < FINAL_LEVEL:
+            pipeline.prefetch(*state.upcoming())
+
+    load_level()
+
+    hide_timer = None
     input_box = pygame.Rect(50, BASE_HEIGHT + 20, BASE_WIDTH - 200, 40)
     submit_button = pygame.Rect(BASE_WIDTH - 145, BASE_HEIGHT + 20, 100, 40)
     reveal_button = pygame.Rect(BASE_WIDTH - 145, BASE_HEIGHT + 70, 100, 40)
 
+    hud = Hud(font, BLACK)
+    hud.add_box(input_box, WHITE, 2)
+    hud.add_box(submit_button, WHITE)
+    hud.add_box(reveal_button, WHITE)
+    hud.add_label("hint1", (50, BASE_HEIGHT + 75), WHITE)
+    hud.add_label("hint2", (50, BASE_HEIGHT + 110), WHITE)
+    hud.add_label("level", (50, BASE_HEIGHT + 140), WHITE)
+    hud.add_label("attempts", (BASE_WIDTH - 220, BASE_HEIGHT + 130), WHITE)
+    hud.add_label("input", (input_box.x + 5, input_box.y + 5), WHITE)
+    hud.add_label("submit", (BASE_WIDTH - 140, BASE_HEIGHT + 25), BLACK, "Submit")
+    hud.add_label("reveal", (BASE_WIDTH - 140, BASE_HEIGHT + 75), BLACK, "Reveal")
+
     text = ""
     running = True
 
-    start_time = time.time()
-    reveal_time = None
-
-    while running:
-        play_sounds_from_queue()
-        if level > 15:
-            print("Game finished")
+    def hide_walls():
+        global walls_visible
+        walls_visible = False
+        renderer.set_visible(False)
+
+    def show_walls(duration):
+        global walls_visible
+        nonlocal hide_timer
+        walls_visible = True
+        renderer.set_visible(True)
+        if hide_timer is not None:
+            hide_timer.cancel()
+        hide_timer = scheduler.after(duration, hide_walls)
+
+    def finish_move(outcome):
+        nonlocal running
+        if outcome == REACHED:
+            load_level()
+            show_walls(LEVEL_PREVIEW_TIME)
+        elif outcome in (WON, FAILED):
             running = False
-            break
-
-        screen.fill(BLACK)
-
-        if reveal_time:
-            if time.time() - reveal_time >= 3:
-                walls_visible = False
-                reveal_time = None
-        elif time.time() - start_time >= 5:
-            walls_visible = False
-
-        draw_maze(maze, walls_visible)
-        draw_endpoint(end_x, end_y)
-        draw_player(player_x, player_y, animations['idle'])
-
-        if red_x is not None:
-            draw_special_point(red_x, red_y, reveal_image)
-
-        if green_x is not None:
-            draw_special_point(green_x, green_y, check_image)
-
-        hint1_text = font.render(f"Arrow Hints Left: {hint1}", True, WHITE)
-        hint2_text = font.render(f"Reveal Hints Left: {hint2}", True, WHITE)
-        level_text = font.render(f"Level: {level}", True, WHITE)
-        attempts_text = font.render(f"Attempts Left: {attempts}", True, WHITE)
-
-        screen.blit(hint1_text, (50, BASE_HEIGHT + 75))
-        screen.blit(hint2_text, (50, BASE_HEIGHT + 110))
-        screen.blit(level_text, (50, BASE_HEIGHT + 140))
-        screen.blit(attempts_text, (50, BASE_HEIGHT + 175))
 
-        pygame.draw.rect(screen, WHITE, input_box, 2)
-        text_surface = font.render(text, True, WHITE)
-        screen.blit(text_surface, (input_box.x + 5, input_box.y + 5))
+    def submit():
+        nonlocal text
+        if walls_visible:
+            print("You cannot move while walls are visible!")
+            return
+        if scheduler.busy:
+            print("Wait for the current move to finish!")
+            return
 
-        pygame.draw.rect(screen, WHITE, submit_button)
-        pygame.draw.rect(screen, WHITE, reveal_button)
-        attempts_text = font.render(f"Attempts Left: {attempts}", True, WHITE)
+        scheduler.spawn(process_input_with_animation(state, state.run(text)), finish_move)
+        text = ""
 
-        screen.blit(font.render("Submit", True, BLACK), (BASE_WIDTH - 140, BASE_HEIGHT + 25))
-        screen.blit(font.render("Reveal", True, BLACK), (BASE_WIDTH - 140, BASE_HEIGHT + 75))
-        screen.blit(attempts_text, (BASE_WIDTH - 220, BASE_HEIGHT + 130))
+    overlay = Overlay(pygame.font.Font(None, 24), (5, 5), WHITE, GRAY) if PROFILE_OVERLAY else None
+    frames = 0
 
-        pygame.display.flip()
+    show_walls(LEVEL_PREVIEW_TIME)
 
-        for event in pygame.event.get():
+    session.start()
+    frame_start = time.perf_counter()
+    while running:
+        for event in session.events():
             if event.type == pygame.QUIT:
                 running = False
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
-                    if walls_visible:
-                        print("You cannot move while walls are visible!")
-                        continue
-                    attempts -= 1
-                    if attempts <= 0:
-                        print("Failure! No attempts left.")
-                        running = False
-                        break
-
-                    new_x, new_y, success = process_input_with_animation(player_x, player_y, text, maze)
-                    if (new_x, new_y) != (player_x, player_y):
-                        player_x, player_y = new_x, new_y
-                    text = ""
-
-                    if event.key == pygame.K_UP:
-                        draw_player(player_x, player_y, animations['N'][0])
-                        pygame.display.flip()
-                    elif event.key == pygame.K_DOWN:
-                        draw_player(player_x, player_y, animations['S'][0])
-                        pygame.display.flip()
-                    elif event.key == pygame.K_LEFT:
-                        draw_player(player_x, player_y, animations['W'][0])
-                        pygame.display.flip()
-                    elif event.key == pygame.K_RIGHT:
-                        draw_player(player_x, player_y, animations['E'][0])
-                        pygame.display.flip()
-
-                    if (player_x, player_y) == (green_x, green_y):
-                        hint1 += 1
-                        green_x, green_y = None, None
-                        print("You collected the green circle! Hint1 increased.")
-
-                    if (player_x, player_y) == (red_x, red_y):
-                        hint2 += 1
-                        red_x, red_y = None, None
-                        print("You collected the red circle! Hint2 increased.")
-
-                    if (player_x, player_y) == (end_x, end_y):
-                        print("End achieved!")
-
-                        level += 1
-                        x = min(level - 1, 5)
-                        attempts = min(4 + level, 10)
-
-                        screen.fill(BLACK)
-                        pygame.display.flip()
-
-                        maze = generate_maze(ROWS + x, COLS + x)
-                        CELL_SIZE = calculate_cell_size(ROWS + x, COLS + x)
-
-                        update_animations()
-                        start_x, start_y = random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)
-                        player_x, player_y = start_x, start_y
-                        end_x, end_y = random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)
-
-                        red_x, red_y = (
-                            random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)) if random.randint(1,3) == 1 else (None, None)
-                        green_x, green_y = (
-                            random.randint(0, COLS + x - 1), random.randint(0, ROWS + x - 1)) if random.randint(1,5) == 1 else (None, None)
-
-                        walls_visible = True
-                        draw_maze(maze, walls_visible)
-                        draw_endpoint(end_x, end_y)
-                        if red_x is not None:
-                            draw_special_point(red_x, red_y, reveal_image)
-
-                        if green_x is not None:
-                            draw_special_point(green_x, green_y, check_image)
-                        draw_player(player_x, player_y, animations['idle'])
-                        pygame.display.flip()
-
-                        pygame.time.delay(5000)
-
-                        walls_visible = False
-                        start_time = time.time()
-
-
-
+                    submit()
                 elif event.key == pygame.K_BACKSPACE:
                     text = text[:-1]
                 else:
@@ -507,66 +259,91 @@ def main():
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if submit_button.collidepoint(event.pos):
-                    if walls_visible:
-                        print("You cannot move while walls are visible!")
-                        continue
-                    attempts -= 1
-                    if attempts <= 0:
-                        print("Failure! No attempts left.")
-                        running = False
-                        break
-
-                    player_x, player_y, success = process_input_with_animation(player_x, player_y, text, maze)
-                    text = ""
-
-                if reveal_button.collidepoint(event.pos) and hint2 > 0:
-                    walls_visible = True
-                    hint2 -= 1
-                    draw_maze(maze, walls_visible)
-                    pygame.display.flip()
-                    reveal_time = pygame.time.delay(3000)
+                    submit()
+
+                if reveal_button.collidepoint(event.pos) and state.use_reveal():
+                    show_walls(REVEAL_TIME)
 
             if event.type == pygame.KEYDOWN:
-                if hint1 > 0:
+                if state.hints > 0:
                     if event.key in [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]:
                         token = tokenize_arrow_key(event.key)
                         if token:
                             try:
 
-                                parse_tree = parse_arrow_key_input(token)
-                                print_parse_tree(parse_tree)
-
-                                direction_map = {"UP": "W", "DOWN": "S", "LEFT": "A", "RIGHT": "D"}
-                                mapped_direction = direction_map.get(token)
+                                mapped_direction = parse_arrow_key_input(token)
 
                                 if mapped_direction:
-                                    check_direction(player_x, player_y, mapped_direction,maze)
+                                    check_direction(state, mapped_direction, frame_start)
 
 
                                     animation_map = {"UP": "idle_up", "DOWN": "idle_down", "LEFT": "idle_left",
                                                      "RIGHT": "idle_right"}
                                     animations['idle'] = animations.get(animation_map[token], animations['idle'])
-                                    draw_player(player_x, player_y, animations['idle'])
-                                    pygame.display.flip()
                                 else:
                                     print(f"Invalid direction token: {token}")
                             except ValueError as e:
                                 print(f"Error: {e}")
                     else:
                         print(" ")
-                    draw_player(player_x, player_y, animations['idle'])
-                    pygame.display.flip()
                 else:
                     print("Out of hints!")
 
-        hint1_text = font.render(f"Arrow Hints Left: {hint1}", True, WHITE)
-        hint2_text = font.render(f"Reveal Hints Left: {hint2}", True, WHITE)
-        screen.blit(hint1_text, (50, BASE_HEIGHT + 75))
-        screen.blit(hint2_text, (50, BASE_HEIGHT + 110))
-        pygame.display.flip()
-
-        clock.tick(30)
+        cues.update()
 
+        sprites = [endpoint_sprite(*state.end)]
+        if player_pose is not None:
+            sprites.append(player_sprite(*player_pose))
+            renderer.follow((player_pose[0] + 0.5) * CELL_SIZE, (player_pose[1] + 0.5) * CELL_SIZE)
+        else:
+            sprites.append(player_sprite(*state.player, animations['idle']))
+            renderer.follow((state.player[0] + 0.5) * CELL_SIZE, (state.player[1] + 0.5) * CELL_SIZE)
+
+        if state.red is not None:
+            sprites.append(special_point_sprite(*state.red, REVEAL_IMAGE))
+
+        if state.green is not None:
+            sprites.append(special_point_sprite(*state.green, CHECK_IMAGE))
+
+        hud.set_text("hint1", f"Arrow Hints Left: {state.hints}")
+        hud.set_text("hint2", f"Reveal Hints Left: {state.reveals}")
+        hud.set_text("level", f"Level: {state.level}")
+        hud.set_text("attempts", f"Attempts Left: {state.attempts}")
+        hud.set_text("input", text)
+
+        if overlay is not None and frames % 15 == 0:
+            stale = overlay.set_text(profiler.overlay_text())
+            if stale:
+                renderer.mark_rect(stale.move(renderer.view.topleft))
+        frames += 1
+
+        with profiler.section("render"):
+            dirty_rects = renderer.render(sprites)
+        with profiler.section("hud"):
+            if dirty_rects is None:
+                hud.draw(screen)
+                if overlay is not None:
+                    overlay.draw(screen)
+                pygame.display.flip()
+            else:
+                dirty_rects += hud.draw_changed(screen)
+                if overlay is not None:
+                    dirty_rects += overlay.draw(screen, dirty_rects)
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+
+        profiler.record("frame", time.perf_counter() - frame_start)
+        dt = session.tick(30) / 1000
+        profiler.record("frame_interval", dt)
+        frame_start = time.perf_counter()
+        with profiler.section("scheduler"):
+            scheduler.tick(dt)
+
+    session.finish(state)
+    if profiler.enabled:
+        print(f"Profile written to {profiler.export(PROFILE_JSON)}")
+    pipeline.shutdown()
+    sounds.ready.wait()
     pygame.quit()
 
 
@@ -0,0 +1,158 @@
+from array import array
+
+from compiler import CARDINAL_DIRECTIONS
+from maze import CARDINAL_DELTAS, WALL_N, WALL_S, WALL_E, WALL_W
+
+UNREACHABLE = -1
+MOVE_LETTERS = {cardinal: move for move, cardinal in CARDINAL_DIRECTIONS.items()}
+NORTH, SOUTH, EAST, WEST = (ord(cardinal) for cardinal in "NSEW")
+
+
+class RunLengths:
+    __slots__ = ('rows', 'cols', 'runs')
+
+    def __init__(self, maze):
+        rows, cols, cells = maze.rows, maze.cols, maze.cells
+        typecode = 'H' if max(rows, cols) <= 0xFFFF else 'I'
+        north = array(typecode, [0]) * (rows * cols)
+        south = array(typecode, [0]) * (rows * cols)
+        east = array(typecode, [0]) * (rows * cols)
+        west = array(typecode, [0]) * (rows * cols)
+
+        for y in range(rows):
+            base = y * cols
+            run = 0
+            for i in range(base, base + cols):
+                run = 0 if cells[i] & WALL_W else run + 1
+                west[i] = run
+            run = 0
+            for i in range(base + cols - 1, base - 1, -1):
+                run = 0 if cells[i] & WALL_E else run + 1
+                east[i] = run
+
+        for x in range(cols):
+            run = 0
+            for i in range(x, rows * cols, cols):
+                run = 0 if cells[i] & WALL_N else run + 1
+                north[i] = run
+            run = 0
+            for i in range((rows - 1) * cols + x, -1, -cols):
+                run = 0 if cells[i] & WALL_S else run + 1
+                south[i] = run
+
+        self.rows = rows
+        self.cols = cols
+        self.runs = {'N': north, 'S': south, 'E': east, 'W': west}
+
+    def run(self, x, y, direction):
+        return self.runs[direction][y * self.cols + x]
+
+    def reach(self, x, y, direction, steps):
+        run = self.runs[direction][y * self.cols + x]
+        return steps if steps < run else run
+
+
+class DistanceField:
+    __slots__ = ('rows', 'cols', 'goal', 'distances', 'moves', 'order', 'offsets')
+
+    def __init__(self, maze, goal):
+        rows, cols, cells = maze.rows, maze.cols, maze.cells
+        goal_x, goal_y = goal
+        if not maze.in_bounds(goal_x, goal_y):
+            raise ValueError(f"Goal {goal} is outside the maze")
+
+        distances = [UNREACHABLE] * (rows * cols)
+        moves = bytearray(rows * cols)
+        start = goal_y * cols + goal_x
+        distances[start] = 0
+        order = [start]
+        offsets = [0]
+        head = 0
+
+        append = order.append
+        while head < len(order):
+            i = order[head]
+            head += 1
+            walls = cells[i]
+            distance = distances[i] + 1
+            if distance == len(offsets):
+                offsets.append(len(order))
+            if not walls & WALL_N and distances[i - cols] == UNREACHABLE:
+                distances[i - cols] = distance
+                moves[i - cols] = SOUTH
+                append(i - cols)
+            if not walls & WALL_S and distances[i + cols] == UNREACHABLE:
+                distances[i + cols] = distance
+                moves[i + cols] = NORTH
+                append(i + cols)
+            if not walls & WALL_E and distances[i + 1] == UNREACHABLE:
+                distances[i + 1] = distance
+                moves[i + 1] = WEST
+                append(i + 1)
+            if not walls & WALL_W and distances[i - 1] == UNREACHABLE:
+                distances[i - 1] = distance
+                moves[i - 1] = EAST
+                append(i - 1)
+        if len(order) == offsets[-1]:
+            offsets.pop()
+
+        self.rows = rows
+        self.cols = cols
+        self.goal = (goal_x, goal_y)
+        self.distances = array('l', distances)
+        self.moves = moves
+        self.order = array('l', order)
+        self.offsets = offsets
+
+    @property
+    def farthest(self):
+        return len(self.offsets) - 1
+
+    def distance(self, x, y):
+        return self.distances[y * self.cols + x]
+
+    def next_move(self, x, y):
+        move = self.moves[y * self.cols + x]
+        return chr(move) if move else None
+
+    def path(self, x, y):
+        if self.distance(x, y) == UNREACHABLE:
+            return None
+        path = [(x, y)]
+        while (x, y) != self.goal:
+            dx, dy = CARDINAL_DELTAS[chr(self.moves[y * self.cols + x])]
+            x, y = x + dx, y + dy
+            path.append((x, y))
+        return path
+
+    def command(self, x, y):
+        if self.distance(x, y) == UNREACHABLE:
+            return None
+        cols, moves, goal = self.cols, self.moves, self.goal
+        parts = []
+        while (x, y) != goal:
+            move = moves[y * cols + x]
+            dx, dy = CARDINAL_DELTAS[chr(move)]
+            steps = 0
+            while (x, y) != goal and moves[y * cols + x] == move:
+                x, y = x + dx, y + dy
+                steps += 1
+            parts.append(MOVE_LETTERS[chr(move)] + (str(steps) if steps > 1 else ""))
+        return "".join(parts)
+
+    def cells_between(self, low, high=None):
+        offsets = self.offsets
+        first = offsets[low] if low < len(offsets) else len(self.order)
+        last = len(self.order) if high is None or high + 1 >= len(offsets) else offsets[high + 1]
+        return first, last
+
+    def pick(self, rng, low=0, high=None, exclude=()):
+        first, last = self.cells_between(max(0, low), high)
+        if last - first <= len(exclude):
+            cells = [(i % self.cols, i // self.cols) for i in self.order[first:last]]
+            cells = [cell for cell in cells if cell not in exclude]
+            return rng.choice(cells) if cells else None
+        while True:
+            y, x = divmod(self.order[rng.randrange(first, last)], self.cols)
+            if (x, y) not in exclude:
+                return x, y
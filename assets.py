@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from audio import trim_sound
+from profiler import profiler
+
+
+class AssetCache:
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.images = {}
+        self.surfaces = OrderedDict()
+        self.lock = threading.RLock()
+
+    def image(self, path):
+        with self.lock:
+            image = self.images.get(path)
+            if image is None:
+                profiler.count("image_loads")
+                image = pygame.image.load(path).convert_alpha()
+                self.images[path] = image
+            return image
+
+    def _get(self, key):
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.surfaces.move_to_end(key)
+            return surface
+
+    def _put(self, key, surface):
+        with self.lock:
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+            return surface
+
+    def scaled(self, path, size):
+        key = (path, size)
+        surface = self._get(key)
+        if surface is None:
+            profiler.count("scales")
+            surface = self._put(key, pygame.transform.scale(self.image(path), size))
+        return surface
+
+    def sprite(self, path, rect, size):
+        key = (path, rect, size)
+        surface = self._get(key)
+        if surface is None:
+            raw_sprite = self.image(path).subsurface(pygame.Rect(rect))
+            profiler.count("scales")
+            surface = self._put(key, pygame.transform.scale(raw_sprite, size))
+        return surface
+
+    def clear(self):
+        with self.lock:
+            self.surfaces.clear()
+
+
+class SoundBank:
+    def __init__(self, paths, volume=1.0, buffer=None, trim_below=None):
+        self.paths = paths
+        self.volume = volume
+        self.buffer = buffer
+        self.trim_below = trim_below
+        self.sounds = {}
+        self.ready = threading.Event()
+        self.thread = None
+
+    def load_async(self):
+        self.thread = threading.Thread(target=self.load, name="sound-loader", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        try:
+            if not pygame.mixer.get_init():
+                if self.buffer:
+                    pygame.mixer.init(buffer=self.buffer)
+                else:
+                    pygame.mixer.init()
+            for name, path in self.paths.items():
+                sound = pygame.mixer.Sound(path)
+                sound.set_volume(self.volume)
+                if self.trim_below:
+                    sound = trim_sound(sound, self.trim_below)
+                self.sounds[name] = sound
+        except pygame.error as e:
+            print(f"Audio unavailable: {e}")
+        finally:
+            self.ready.set()
+
+    def get(self, name):
+        return self.sounds.get(name)
@@ -0,0 +1,97 @@
+import time
+from array import array
+
+import pygame
+
+from profiler import profiler
+
+COALESCE_WINDOW = 0.08
+STALE_AFTER = 0.15
+
+
+def leading_silence(raw, channels, threshold):
+    samples = array('h')
+    samples.frombytes(raw[:len(raw) - len(raw) % 2])
+    limit = int(threshold * 32767)
+    for i, sample in enumerate(samples):
+        if sample > limit or -sample > limit:
+            return (i - i % channels) * 2
+    return len(raw)
+
+
+def trim_sound(sound, threshold):
+    mixer = pygame.mixer.get_init()
+    if mixer is None or mixer[1] != -16:
+        return sound
+    raw = sound.get_raw()
+    start = leading_silence(raw, mixer[2], threshold)
+    if not start or start >= len(raw):
+        return sound
+    trimmed = pygame.mixer.Sound(buffer=raw[start:])
+    trimmed.set_volume(sound.get_volume())
+    return trimmed
+
+
+class CuePlayer:
+    def __init__(self, bank, channels, coalesce=COALESCE_WINDOW, stale_after=STALE_AFTER):
+        self.bank = bank
+        self.routes = channels
+        self.coalesce = coalesce
+        self.stale_after = stale_after
+        self.channels = None
+        self.pending = {}
+        self.started = {}
+        self.output_latency = 0.0
+
+    def attach(self):
+        self.channels = {}
+        mixer = pygame.mixer.get_init()
+        if mixer is None:
+            return
+        reserved = max(self.routes.values()) + 1
+        if pygame.mixer.get_num_channels() < reserved:
+            pygame.mixer.set_num_channels(reserved)
+        pygame.mixer.set_reserved(reserved)
+        self.channels = {name: pygame.mixer.Channel(index) for name, index in self.routes.items()}
+        if self.bank.buffer:
+            self.output_latency = self.bank.buffer / mixer[0]
+
+    def cue(self, name, requested=None):
+        if requested is None:
+            requested = time.perf_counter()
+        if self.channels is None and self.bank.ready.is_set():
+            self.attach()
+        if self.channels is None:
+            route = self.routes[name]
+            if route in self.pending:
+                profiler.count("cues_dropped")
+            self.pending[route] = (name, requested)
+            return
+        self.start(name, requested)
+
+    def start(self, name, requested):
+        channel = self.channels.get(name)
+        sound = self.bank.get(name)
+        if channel is None or sound is None:
+            return
+        route = self.routes[name]
+        previous, previous_time = self.started.get(route, (None, 0.0))
+        if previous == name and requested - previous_time < self.coalesce and channel.get_busy():
+            profiler.count("cues_coalesced")
+            return
+        channel.play(sound)
+        self.started[route] = (name, requested)
+        profiler.count("cues_played")
+        profiler.record("cue_latency", time.perf_counter() - requested + self.output_latency)
+
+    def update(self):
+        if self.channels is not None or not self.bank.ready.is_set():
+            return
+        self.attach()
+        now = time.perf_counter()
+        for name, requested in self.pending.values():
+            if now - requested > self.stale_after:
+                profiler.count("cues_dropped")
+            else:
+                self.start(name, requested)
+        self.pending.clear()
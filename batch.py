@@ -0,0 +1,143 @@
+from itertools import islice
+
+import numpy as np
+
+from analysis import RunLengths
+from compiler import CommandSyntaxError, iter_moves, optimize_ir, parse_program
+from vm import COMPILE_PASSES, MOVE_OPCODES
+
+BATCH_BUDGET = 1_000
+BLOCK_SIZE = 4096
+
+# Indexed by opcode; row 0 is the padding move that never goes anywhere.
+DELTA_X = np.array([0, 0, 0, 1, -1], dtype=np.int64)
+DELTA_Y = np.array([0, -1, 1, 0, 0], dtype=np.int64)
+OPCODE_LOOKUP = np.zeros(256, dtype=np.int8)
+OPCODE_LOOKUP[[ord(direction) for direction in MOVE_OPCODES]] = list(MOVE_OPCODES.values())
+
+
+def run_table_matrix(runs):
+    cells = runs.rows * runs.cols
+    tables = np.zeros((5, cells), dtype=np.int64)
+    for direction, opcode in (('N', 1), ('S', 2), ('E', 3), ('W', 4)):
+        tables[opcode] = np.frombuffer(runs.runs[direction], dtype=np.dtype(runs.runs[direction].typecode))
+    return tables
+
+
+
+
+def expand_programs(ir_lists, budget=BATCH_BUDGET):
+    directions = []
+    counts = []
+    lengths = []
+    failed = []
+    for i, ir_list in enumerate(ir_lists):
+        ir_list = ir_list or ()
+        if all(instruction.command == "MOVE" for instruction in ir_list):
+            moves = ir_list[:budget + 1]
+            program_directions = [instruction.direction for instruction in moves]
+            program_counts = [instruction.steps for instruction in moves]
+        else:
+            try:
+                ir_list = optimize_ir(ir_list, passes=COMPILE_PASSES, dump=False)
+                moves = list(islice(iter_moves(ir_list), budget + 1))
+            except RecursionError:
+                failed.append(i)
+                moves = []
+            program_directions = [direction for direction, _ in moves]
+            program_counts = [steps for _, steps in moves]
+        lengths.append(len(moves))
+        directions.extend(program_directions[:budget])
+        counts.extend(program_counts[:budget])
+
+    lengths = np.array(lengths, dtype=np.int64)
+    complete = lengths <= budget
+    complete[failed] = False
+    lengths = np.minimum(lengths, budget)
+
+    count = len(lengths)
+    length = int(lengths.max()) if count else 0
+    opcodes = np.zeros((length, count), dtype=np.int8)
+    steps = np.zeros((length, count), dtype=np.int64)
+    if directions:
+        columns = np.repeat(np.arange(count), lengths)
+        rows = np.arange(len(directions)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        opcodes[rows, columns] = OPCODE_LOOKUP[np.frombuffer("".join(directions).encode("ascii"), dtype=np.uint8)]
+        steps[rows, columns] = counts
+    return opcodes, steps, complete
+
+
+def parse_commands(commands):
+    ir_lists = []
+    valid = np.ones(len(commands), dtype=bool)
+    for i, command in enumerate(commands):
+        try:
+            ir_lists.append(parse_program(command))
+        except CommandSyntaxError:
+            ir_lists.append(())
+            valid[i] = False
+    return ir_lists, valid
+
+
+def evaluate_block(tables, cols, opcodes, steps, xs, ys, goal):
+    count = len(xs)
+    wall_hits = np.zeros(count, dtype=np.int64)
+    if goal is None:
+        reached = np.zeros(count, dtype=bool)
+    else:
+        goal_x, goal_y = goal
+        reached = (xs == goal_x) & (ys == goal_y)
+
+    for opcode, wanted in zip(opcodes, steps):
+        if goal is not None:
+            opcode = np.where(reached, 0, opcode)
+            wanted = np.where(reached, 0, wanted)
+        run = tables[opcode, ys * cols + xs]
+        taken = np.minimum(wanted, run)
+        new_xs = xs + DELTA_X[opcode] * taken
+        new_ys = ys + DELTA_Y[opcode] * taken
+        blocked = wanted > run
+
+        if goal is not None:
+            arrived = ((np.minimum(xs, new_xs) <= goal_x) & (goal_x <= np.maximum(xs, new_xs)) &
+                       (np.minimum(ys, new_ys) <= goal_y) & (goal_y <= np.maximum(ys, new_ys)) & ~reached)
+            new_xs = np.where(arrived, goal_x, new_xs)
+            new_ys = np.where(arrived, goal_y, new_ys)
+            blocked &= ~arrived
+            reached |= arrived
+
+        wall_hits += blocked
+        xs, ys = new_xs, new_ys
+
+    return xs, ys, wall_hits, reached
+
+
+def evaluate_batch(ir_lists, maze, starts, goal=None, runs=None, budget=BATCH_BUDGET, block_size=BLOCK_SIZE):
+    runs = runs if runs is not None else RunLengths(maze)
+    tables = run_table_matrix(runs)
+    count = len(ir_lists)
+
+    starts = np.asarray(starts, dtype=np.int64)
+    if starts.ndim == 1:
+        starts = np.broadcast_to(starts, (count, 2))
+
+    xs = np.empty(count, dtype=np.int64)
+    ys = np.empty(count, dtype=np.int64)
+    wall_hits = np.empty(count, dtype=np.int64)
+    reached = np.empty(count, dtype=bool)
+    complete = np.empty(count, dtype=bool)
+
+    for first in range(0, count, block_size):
+        last = min(first + block_size, count)
+        opcodes, steps, complete[first:last] = expand_programs(ir_lists[first:last], budget)
+        block = evaluate_block(tables, maze.cols, opcodes, steps,
+                               starts[first:last, 0].copy(), starts[first:last, 1].copy(), goal)
+        xs[first:last], ys[first:last], wall_hits[first:last], reached[first:last] = block
+
+    return xs, ys, wall_hits, reached, complete
+
+
+def evaluate_commands(commands, maze, starts, goal=None, runs=None, budget=BATCH_BUDGET):
+    ir_lists, valid = parse_commands(commands)
+    xs, ys, wall_hits, reached, complete = evaluate_batch(ir_lists, maze, starts, goal, runs, budget)
+    return xs, ys, wall_hits, reached & valid, complete & valid
@@ -0,0 +1,572 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from analysis import DistanceField, RunLengths
+from compiler import execute_ir, optimize_ir, parse_program, parse_to_ir
+from generators import ALGORITHMS, generate_maze
+from vm import VM, compile_program
+
+
+def bench_generators(args):
+    cells = args.size * args.size
+    for algorithm in args.algorithms or ALGORITHMS:
+        best = None
+        for seed in range(args.repeat):
+            start = time.perf_counter()
+            generate_maze(args.size, args.size, algorithm=algorithm, seed=seed)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{algorithm:<8} {args.size}x{args.size}  {best * 1000:9.1f} ms  {cells / best:12,.0f} cells/sec")
+
+
+def init_headless_display(width=600, height=765):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    return pygame, pygame.display.set_mode((width, height))
+
+
+def time_frames(pygame, draw_frame, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw_frame()
+        pygame.display.flip()
+    return (time.perf_counter() - start) / frames
+
+
+def bench_walls(args):
+    pygame, screen = init_headless_display()
+    from render import WallLayer, draw_walls
+
+    maze = generate_maze(args.size, args.size, seed=0)
+    cell_size = max(1, 600 // args.size)
+    layer = WallLayer(((255, 255, 255), (0, 0, 0)))
+
+    def per_line_frame():
+        screen.fill((0, 0, 0))
+        draw_walls(screen, maze, cell_size, (255, 255, 255))
+
+    def cached_frame():
+        screen.fill((0, 0, 0))
+        screen.blit(layer.get(maze, cell_size, (255, 255, 255)), (0, 0))
+
+    base = time_frames(pygame, lambda: screen.fill((0, 0, 0)), args.frames)
+    before = time_frames(pygame, per_line_frame, args.frames)
+    after = time_frames(pygame, cached_frame, args.frames)
+    print(f"{args.size}x{args.size} maze, cell size {cell_size}, {args.frames} frames")
+    print(f"fill + flip    {base * 1000:8.3f} ms/frame")
+    print(f"per-line draw  {before * 1000:8.3f} ms/frame  walls {(before - base) * 1000:.3f} ms")
+    print(f"cached layer   {after * 1000:8.3f} ms/frame  walls {(after - base) * 1000:.3f} ms  "
+          f"({before / after:.1f}x per frame)")
+    pygame.quit()
+
+
+def random_programs(count, length, seed=0):
+    rng = random.Random(seed)
+    programs = []
+    for _ in range(count):
+        moves = []
+        for _ in range(length):
+            steps = str(rng.randint(1, 9)) if rng.random() < 0.8 else ""
+            moves.append(rng.choice("WASD") + steps)
+        programs.append("".join(moves))
+    return programs
+
+
+def run_programs(programs, maze, starts, runs=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        finals = [execute_ir(ir_list, x, y, maze, runs) for ir_list, (x, y) in zip(programs, starts)]
+        return finals, time.perf_counter() - start
+
+
+def bench_ir(args):
+    maze = generate_maze(args.size, args.size, seed=0)
+    rng = random.Random(1)
+    starts = [(rng.randrange(maze.cols), rng.randrange(maze.rows)) for _ in range(args.programs)]
+    index_start = time.perf_counter()
+    runs = RunLengths(maze)
+    index_time = time.perf_counter() - index_start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = [parse_to_ir(program) for program in random_programs(args.programs, args.length)]
+        optimize_start = time.perf_counter()
+        optimized = [optimize_ir(ir_list, maze, start, runs=runs) for ir_list, start in zip(parsed, starts)]
+        optimize_time = time.perf_counter() - optimize_start
+
+    raw_finals, raw_time = run_programs(parsed, maze, starts)
+    opt_finals, opt_time = run_programs(optimized, maze, starts)
+    indexed_finals, indexed_time = run_programs(parsed, maze, starts, runs)
+    if raw_finals != opt_finals or raw_finals != indexed_finals:
+        raise SystemExit("Optimized programs ended on different cells")
+
+    def describe(name, programs, elapsed):
+        instructions = sum(len(ir_list) for ir_list in programs)
+        steps = sum(instruction.steps for ir_list in programs for instruction in ir_list)
+        print(f"{name:<10} {instructions / len(programs):7.2f} instructions/program  "
+              f"{steps / len(programs):7.2f} steps/program  {elapsed * 1000:8.1f} ms")
+
+    print(f"{args.programs} programs of {args.length} moves on a {args.size}x{args.size} maze")
+    describe("as parsed", parsed, raw_time)
+    describe("optimized", optimized, opt_time)
+    describe("run table", parsed, indexed_time)
+    print(f"optimizer  {optimize_time * 1000:8.1f} ms total, run table built in {index_time * 1000:.1f} ms")
+
+
+# Repeats whose bodies move nothing or whose counts are huge; both evaluators must stay within budget.
+DEGENERATE_PROGRAMS = ["()2147483647", "((D)0)99999999", "(D0)2147483647", "(D)2147483647", "D1(W*A*)99999"]
+
+
+def random_loop_programs(count, seed=0):
+    rng = random.Random(seed)
+
+    def sequence(depth):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            if depth < 2 and rng.random() < 0.25:
+                parts.append(f"({sequence(depth + 1)}){rng.randint(2, 9)}")
+            else:
+                parts.append(rng.choice("WASD") + rng.choice(("", "*", str(rng.randint(1, 12)))))
+        return "".join(parts)
+
+    return [sequence(0) for _ in range(count)]
+
+
+def bench_vm(args):
+    maze = generate_maze(args.size, args.size, seed=0)
+    vm = VM(maze)
+    rng = random.Random(1)
+    sources = random_loop_programs(args.programs)
+    starts = [(rng.randrange(maze.cols), rng.randrange(maze.rows)) for _ in range(args.programs)]
+
+    compile_program.cache_clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        compile_start = time.perf_counter()
+        programs = [compile_program(source) for source in sources]
+        compile_time = time.perf_counter() - compile_start
+        parsed = [parse_to_ir(source) for source in sources]
+
+    vm_time = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        results = [vm.run(code, x, y, args.budget) for code, (x, y) in zip(programs, starts)]
+        elapsed = time.perf_counter() - start
+        vm_time = elapsed if vm_time is None else min(vm_time, elapsed)
+
+    ir_finals, ir_time = run_programs(parsed, maze, starts, vm.runs)
+    if [result[:2] for result in results] != ir_finals:
+        raise SystemExit("VM and execute_ir disagree on final cells")
+    with contextlib.redirect_stdout(io.StringIO()):
+        degenerate = [parse_to_ir(source) for source in DEGENERATE_PROGRAMS]
+    if ([vm.run(compile_program(source), 0, 0, args.budget)[:2] for source in DEGENERATE_PROGRAMS]
+            != run_programs(degenerate, maze, [(0, 0)] * len(degenerate), vm.runs)[0]):
+        raise SystemExit("VM and execute_ir disagree on degenerate repeats")
+
+    executed = sum(result[3] for result in results)
+    print(f"{args.programs} programs on a {args.size}x{args.size} maze, {executed / args.programs:.1f} ops/program")
+    print(f"execute_ir {ir_time * 1000:8.1f} ms  {args.programs / ir_time:12,.0f} programs/sec")
+    print(f"vm         {vm_time * 1000:8.1f} ms  {args.programs / vm_time:12,.0f} programs/sec")
+    print(f"compile    {compile_time * 1000:8.1f} ms  {args.programs / compile_time:12,.0f} programs/sec")
+
+
+def bench_batch(args):
+    from batch import evaluate_batch
+
+    maze = generate_maze(args.size, args.size, seed=0)
+    runs = RunLengths(maze)
+    rng = random.Random(1)
+    starts = [(rng.randrange(maze.cols), rng.randrange(maze.rows)) for _ in range(args.programs)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = [parse_to_ir(program) for program in random_programs(args.programs, args.length)]
+
+    scalar_finals, scalar_time = run_programs(parsed, maze, starts)
+    indexed_finals, indexed_time = run_programs(parsed, maze, starts, runs)
+    batch_time = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        xs, ys, wall_hits, reached, complete = evaluate_batch(parsed, maze, starts, runs=runs)
+        elapsed = time.perf_counter() - start
+        batch_time = elapsed if batch_time is None else min(batch_time, elapsed)
+
+    if list(zip(xs.tolist(), ys.tolist())) != scalar_finals:
+        raise SystemExit("evaluate_batch and execute_ir disagree on final cells")
+    with contextlib.redirect_stdout(io.StringIO()):
+        degenerate = [parse_to_ir(source) for source in DEGENERATE_PROGRAMS]
+    xs_edge, ys_edge = evaluate_batch(degenerate, maze, (0, 0), runs=runs)[:2]
+    if list(zip(xs_edge.tolist(), ys_edge.tolist())) != run_programs(degenerate, maze, [(0, 0)] * len(degenerate))[0]:
+        raise SystemExit("evaluate_batch and execute_ir disagree on degenerate repeats")
+
+    print(f"{args.programs} programs of {args.length} moves on a {args.size}x{args.size} maze, "
+          f"{wall_hits.mean():.1f} wall hits/program")
+    for name, elapsed in (("execute_ir", scalar_time), ("run table", indexed_time), ("batch", batch_time)):
+        print(f"{name:<10} {elapsed * 1000:8.1f} ms  {args.programs / elapsed:12,.0f} programs/sec")
+
+
+def bench_distance(args):
+    maze = generate_maze(args.size, args.size, seed=0)
+    rng = random.Random(1)
+    goal = (rng.randrange(maze.cols), rng.randrange(maze.rows))
+    cells = maze.rows * maze.cols
+
+    start = time.perf_counter()
+    field = DistanceField(maze, goal)
+    build_time = time.perf_counter() - start
+
+    queries = [(rng.randrange(maze.cols), rng.randrange(maze.rows)) for _ in range(args.queries)]
+    start = time.perf_counter()
+    for x, y in queries:
+        field.distance(x, y)
+        field.next_move(x, y)
+    lookup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    starts = [field.pick(rng, field.farthest // 2) for _ in range(args.queries)]
+    pick_time = time.perf_counter() - start
+
+    far_y, far_x = divmod(field.order[-1], maze.cols)
+    start = time.perf_counter()
+    command = field.command(far_x, far_y)
+    command_time = time.perf_counter() - start
+
+    print(f"{args.size}x{args.size} maze, farthest cell {field.farthest} steps from the end")
+    print(f"build      {build_time * 1000:8.1f} ms  {cells / build_time:12,.0f} cells/sec")
+    print(f"hints      {lookup_time * 1000:8.1f} ms  {args.queries / lookup_time:12,.0f} queries/sec")
+    print(f"placement  {pick_time * 1000:8.1f} ms  {len(starts) / pick_time:12,.0f} picks/sec")
+    print(f"command    {command_time * 1000:8.1f} ms  {len(command)} characters for the farthest cell")
+
+
+def bench_sessions(args):
+    from game import GameState
+
+    rng = random.Random(1)
+    levels = steps = 0
+    outcomes = {}
+    start = time.perf_counter()
+    for seed in range(args.sessions):
+        state = GameState(seed)
+        while not state.over:
+            if rng.random() < args.mistakes:
+                command = "".join(rng.choice("WASD") for _ in range(3))
+            else:
+                command = state.field.command(*state.player)
+            level = state.level
+            outcome = state.step(command)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            levels += state.level != level
+            steps += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.sessions} headless sessions, {levels} levels cleared, "
+          + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())))
+    print(f"sessions   {elapsed * 1000:8.1f} ms  {args.sessions / elapsed:12,.0f} sessions/sec")
+    print(f"commands   {elapsed * 1000:8.1f} ms  {steps / elapsed:12,.0f} commands/sec")
+
+
+STARTUP_PROBE = """
+import os, sys, time
+started = time.perf_counter()
+import pygame
+
+def first_frame(*args):
+    frame = time.perf_counter() - started
+    sounds = getattr(sys.modules["14"], "sounds", None)
+    if sounds is not None:
+        sounds.ready.wait()
+    print(f"{frame:.6f} {time.perf_counter() - started:.6f}", flush=True)
+    os._exit(0)
+
+pygame.display.flip = first_frame
+pygame.display.update = first_frame
+sys.path.insert(0, os.getcwd())
+__import__("14").main()
+"""
+
+
+def bench_startup(args):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    launches, frames, audio = [], [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=root, env=env,
+                                capture_output=True, text=True, check=True)
+        launches.append(time.perf_counter() - start)
+        frame, ready = map(float, result.stdout.split()[-2:])
+        frames.append(frame)
+        audio.append(ready)
+
+    print(f"{args.repeat} cold starts with dummy drivers, median (best)")
+    for name, samples in (("process", launches), ("first frame", frames), ("audio ready", audio)):
+        print(f"{name:<12} {statistics.median(samples) * 1000:8.1f} ms  ({min(samples) * 1000:.1f} ms)")
+
+
+def bench_transition(args):
+    init_headless_display()
+    import game
+    from pipeline import LevelPipeline
+    front_end = __import__("14")
+    front_end.setup()
+    renderer = front_end.renderer
+
+    def swap(bundle):
+        renderer.reset(bundle.level.maze, bundle.cell_size, layer=bundle.layer)
+        renderer.render([])
+
+    print(f"level transition time, best of {args.repeat}")
+    for size in args.sizes or (6, 11, 50, 200):
+        game.ROWS = game.COLS = size
+        inline = prefetched = None
+        for seed in range(args.repeat):
+            start = time.perf_counter()
+            swap(front_end.build_bundle(1, seed))
+            elapsed = time.perf_counter() - start
+            inline = elapsed if inline is None else min(inline, elapsed)
+
+            pipeline = LevelPipeline(front_end.build_bundle)
+            pipeline.prefetch(1, seed)
+            while not pipeline.ready(1, seed):
+                time.sleep(0.001)
+            start = time.perf_counter()
+            swap(pipeline.take(1, seed))
+            elapsed = time.perf_counter() - start
+            prefetched = elapsed if prefetched is None else min(prefetched, elapsed)
+            pipeline.shutdown()
+        print(f"{size:>4}x{size:<4} inline {inline * 1000:8.2f} ms   prefetched {prefetched * 1000:8.2f} ms")
+
+
+def bench_levelpack(args):
+    import tempfile
+    from game import build_level
+    from levelpack import LevelPack, bake_pack
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "levels.mzp")
+        start = time.perf_counter()
+        count = bake_pack(path, args.levels, args.variants, workers=args.workers)
+        bake_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pack = LevelPack(path)
+        open_time = time.perf_counter() - start
+
+        rng = random.Random(1)
+        picks = [(rng.randint(1, args.levels), rng.getrandbits(32)) for _ in range(args.loads)]
+        start = time.perf_counter()
+        for number, seed in picks:
+            build_level(number, seed)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for number, seed in picks:
+            pack.load(number, seed)
+        load_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for number, seed in picks:
+            variants = pack.variants[number]
+            pack.record(variants[seed % len(variants)])
+        record_time = time.perf_counter() - start
+        pack.close()
+
+        print(f"baked {count} levels ({os.path.getsize(path):,} bytes) in {bake_time * 1000:.1f} ms, "
+              f"{count / bake_time:,.0f} levels/sec")
+        print(f"open       {open_time * 1000:8.2f} ms")
+        for name, elapsed in (("generate", build_time), ("pack level", load_time), ("pack cells", record_time)):
+            print(f"{name:<10} {elapsed / args.loads * 1e6:8.1f} us/level")
+
+
+def bench_parse(args):
+    sources = random_loop_programs(args.programs)
+
+    def timed(parse):
+        best = None
+        for _ in range(args.repeat):
+            parse_program.cache_clear()
+            start = time.perf_counter()
+            parse()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def cold():
+        for source in sources:
+            parse_to_ir(source)
+
+    def cached():
+        for source in sources:
+            parse_to_ir(source)
+        for _ in range(args.hits):
+            for source in sources:
+                parse_to_ir(source)
+
+    def debug():
+        for source in sources:
+            parse_to_ir(source, debug=True)
+
+    cold_time = timed(cold)
+    cached_time = timed(cached)
+    with contextlib.redirect_stdout(io.StringIO()):
+        debug_time = timed(debug)
+    cached_count = args.programs * (args.hits + 1)
+    print(f"{args.programs} distinct commands, each submitted {args.hits + 1} times in the cached run")
+    print(f"cold       {cold_time * 1000:8.1f} ms  {args.programs / cold_time:12,.0f} commands/sec")
+    print(f"cached     {cached_time * 1000:8.1f} ms  {cached_count / cached_time:12,.0f} commands/sec")
+    print(f"parse tree {debug_time * 1000:8.1f} ms  {args.programs / debug_time:12,.0f} commands/sec")
+
+
+def bench_audio(args):
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from collections import deque
+    from assets import SoundBank
+    from audio import CuePlayer, leading_silence
+    from profiler import Histogram, profiler
+
+    paths = {"wall": "wall.mp3", "path": "path.mp3"}
+    raw = SoundBank(paths, buffer=args.buffer)
+    raw.load()
+    trimmed = SoundBank(paths, buffer=args.buffer, trim_below=args.threshold)
+    trimmed.load()
+    frequency, _, channels = pygame.mixer.get_init()
+    output = args.buffer / frequency
+
+    def onset(bank, name):
+        return leading_silence(bank.get(name).get_raw(), channels, args.threshold) / (2 * channels * frequency)
+
+    rng = random.Random(0)
+    presses = [(i * args.interval / 1000, rng.choice(("wall", "path"))) for i in range(args.presses)]
+    duration = presses[-1][0] + args.tail
+
+    def simulate(press, poll):
+        start = time.perf_counter()
+        pending = deque(presses)
+        while True:
+            now = time.perf_counter() - start
+            if now > duration:
+                break
+            poll()
+            while pending and pending[0][0] <= now:
+                press(pending.popleft()[1])
+            time.sleep(1 / 30)
+        pygame.mixer.stop()
+
+    queue = deque()
+    queued = Histogram()
+
+    def play_queued():
+        if queue and not pygame.mixer.get_busy():
+            name, pressed = queue.popleft()
+            raw.get(name).play()
+            queued.add(time.perf_counter() - pressed + output + onset(raw, name))
+
+    simulate(lambda name: queue.append((name, time.perf_counter())), play_queued)
+    left = len(queue)
+
+    profiler.enabled = True
+    cues = CuePlayer(trimmed, {"wall": 0, "path": 0}, coalesce=args.coalesce)
+    simulate(cues.cue, cues.update)
+    cued = profiler.histogram("cue_latency")
+
+    print(f"{args.presses} hint cues {args.interval} ms apart, {args.buffer}-sample buffer at {frequency} Hz "
+          f"({output * 1000:.1f} ms)")
+    for name in paths:
+        print(f"{name} onset  {onset(raw, name) * 1000:7.1f} ms untrimmed  {onset(trimmed, name) * 1000:7.1f} ms trimmed")
+    for label, histogram, note in (("queue", queued, f"{left} still queued"),
+                                   ("cues", cued, f"{profiler.counters.get('cues_coalesced', 0)} coalesced, "
+                                                  f"{profiler.counters.get('cues_dropped', 0)} dropped")):
+        summary = histogram.summary()
+        print(f"{label:<6} {histogram.count:4} played, {note}; latency p50 {summary['p50_ms']:.1f}  "
+              f"p99 {summary['p99_ms']:.1f}  max {summary['max_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maze game micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    generators_parser = subparsers.add_parser("generators", help="maze generation throughput")
+    generators_parser.add_argument("--size", type=int, default=500)
+    generators_parser.add_argument("--repeat", type=int, default=3)
+    generators_parser.add_argument("--algorithm", dest="algorithms", action="append", choices=sorted(ALGORITHMS))
+    generators_parser.set_defaults(run=bench_generators)
+
+    walls_parser = subparsers.add_parser("walls", help="wall rendering frame time, per-line vs cached layer")
+    walls_parser.add_argument("--size", type=int, default=11)
+    walls_parser.add_argument("--frames", type=int, default=300)
+    walls_parser.set_defaults(run=bench_walls)
+
+    ir_parser = subparsers.add_parser("ir", help="instructions executed per program before and after IR optimization")
+    ir_parser.add_argument("--size", type=int, default=11)
+    ir_parser.add_argument("--programs", type=int, default=2000)
+    ir_parser.add_argument("--length", type=int, default=9)
+    ir_parser.set_defaults(run=bench_ir)
+
+    vm_parser = subparsers.add_parser("vm", help="bytecode VM throughput against execute_ir")
+    vm_parser.add_argument("--size", type=int, default=11)
+    vm_parser.add_argument("--programs", type=int, default=20000)
+    vm_parser.add_argument("--budget", type=int, default=10_000)
+    vm_parser.add_argument("--repeat", type=int, default=3)
+    vm_parser.set_defaults(run=bench_vm)
+
+    batch_parser = subparsers.add_parser("batch", help="NumPy batch evaluation against scalar execute_ir")
+    batch_parser.add_argument("--size", type=int, default=11)
+    batch_parser.add_argument("--programs", type=int, default=20000)
+    batch_parser.add_argument("--length", type=int, default=9)
+    batch_parser.add_argument("--repeat", type=int, default=3)
+    batch_parser.set_defaults(run=bench_batch)
+
+    distance_parser = subparsers.add_parser("distance", help="distance field build time and hint/placement queries")
+    distance_parser.add_argument("--size", type=int, default=500)
+    distance_parser.add_argument("--queries", type=int, default=100_000)
+    distance_parser.set_defaults(run=bench_distance)
+
+    sessions_parser = subparsers.add_parser("sessions", help="headless GameState sessions played by a solver bot")
+    sessions_parser.add_argument("--sessions", type=int, default=200)
+    sessions_parser.add_argument("--mistakes", type=float, default=0.2)
+    sessions_parser.set_defaults(run=bench_sessions)
+
+    startup_parser = subparsers.add_parser("startup", help="cold-start time to first frame in a fresh process")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    startup_parser.set_defaults(run=bench_startup)
+
+    transition_parser = subparsers.add_parser("transition", help="level swap time, built inline vs prefetched")
+    transition_parser.add_argument("--size", dest="sizes", type=int, action="append")
+    transition_parser.add_argument("--repeat", type=int, default=3)
+    transition_parser.set_defaults(run=bench_transition)
+
+    levelpack_parser = subparsers.add_parser("levelpack", help="level pack bake rate and load time against generation")
+    levelpack_parser.add_argument("--levels", type=int, default=15)
+    levelpack_parser.add_argument("--variants", type=int, default=100)
+    levelpack_parser.add_argument("--workers", type=int, default=None)
+    levelpack_parser.add_argument("--loads", type=int, default=2000)
+    levelpack_parser.set_defaults(run=bench_levelpack)
+
+    parse_parser = subparsers.add_parser("parse", help="command parsing throughput, cold, cached and with parse trees")
+    parse_parser.add_argument("--programs", type=int, default=1000)
+    parse_parser.add_argument("--hits", type=int, default=9)
+    parse_parser.add_argument("--repeat", type=int, default=3)
+    parse_parser.set_defaults(run=bench_parse)
+
+    audio_parser = subparsers.add_parser("audio", help="hint cue latency, polled queue against reserved cue channel")
+    audio_parser.add_argument("--presses", type=int, default=20)
+    audio_parser.add_argument("--interval", type=int, default=150)
+    audio_parser.add_argument("--buffer", type=int, default=256)
+    audio_parser.add_argument("--threshold", type=float, default=0.01)
+    audio_parser.add_argument("--coalesce", type=float, default=0.08)
+    audio_parser.add_argument("--tail", type=float, default=1.0)
+    audio_parser.set_defaults(run=bench_audio)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+import os
+from functools import lru_cache
+
+from profiler import profiler
+
+DIRECTIONS = {'W': (0, -1),
+              'A': (-1, 0),
+              'S': (0, 1),
+              'D': (1, 0)}
+CARDINAL_DIRECTIONS = {'W': 'N',
+                       'A': 'W',
+                       'S': 'S',
+                       'D': 'E'}
+OPPOSITE = {'N': 'S', 'S': 'N', 'E': 'W', 'W': 'E'}
+OPPOSITE_MOVES = {'W': 'S', 'S': 'W', 'A': 'D', 'D': 'A'}
+
+ARROW_MOVES = {"UP": "W", "DOWN": "S", "LEFT": "A", "RIGHT": "D"}
+UNTIL_WALL = 2 ** 31 - 1
+DIGITS = "0123456789"
+# Longer counts are clamped without int(), which rejects more than 4300 digits.
+COUNT_DIGITS = len(str(UNTIL_WALL))
+# Keeps optimize_ir, iter_moves and pickling well inside the recursion limit.
+MAX_NESTING = 100
+INSTRUCTION_BUDGET = 10_000
+
+TOKEN_MOVE = "MOVE"
+TOKEN_COUNT = "COUNT"
+TOKEN_STAR = "STAR"
+TOKEN_OPEN = "OPEN"
+TOKEN_CLOSE = "CLOSE"
+CHARACTER_CLASSES = {
+    **{move: TOKEN_MOVE for move in "WASDwasd"},
+    **{digit: TOKEN_COUNT for digit in DIGITS},
+    "*": TOKEN_STAR,
+    "(": TOKEN_OPEN,
+    ")": TOKEN_CLOSE,
+}
+
+PARSE_CACHE_SIZE = 1024
+PARSE_DEBUG = os.environ.get("MAZE_PARSE_DEBUG") == "1"
+DUMP_IR = os.environ.get("MAZE_DUMP_IR") == "1"
+
+
+class CommandSyntaxError(ValueError):
+    def __init__(self, message, position):
+        super().__init__(f"{message} at column {position + 1}")
+        self.position = position
+
+
+class IRInstruction:
+    def __init__(self, command, direction, steps=1, body=None):
+        self.command = command
+        self.direction = direction
+        self.steps = steps
+        self.body = body
+
+    def __repr__(self):
+        steps = "*" if self.steps == UNTIL_WALL else self.steps
+        if self.body is not None:
+            return f"{self.command}({steps}, {self.body})"
+        return f"{self.command}({self.direction}, {steps})"
+
+
+def classify_token(token):
+    if token in ["UP", "DOWN", "LEFT", "RIGHT"]:
+        return "DIRECTION"
+    return "UNKNOWN"
+
+
+def parse_arrow_key_input(token, debug=None):
+    if classify_token(token) != "DIRECTION":
+        raise ValueError("Invalid token")
+    if PARSE_DEBUG if debug is None else debug:
+        from anytree import Node
+        root = Node("Command")
+        move_node = Node("Move", parent=root)
+        Node(f"Direction: {token}", parent=move_node)
+        print_parse_tree(root)
+    return ARROW_MOVES[token]
+
+
+def tokenize(command):
+    tokens = []
+    i, length = 0, len(command)
+    while i < length:
+        char = command[i]
+        kind = CHARACTER_CLASSES.get(char)
+        if kind is None:
+            raise CommandSyntaxError(f"Invalid move: {char}", i)
+        if kind is TOKEN_COUNT:
+            start = i
+            i += 1
+            while i < length and command[i] in DIGITS:
+                i += 1
+            digits = command[start:i].lstrip("0")
+            count = UNTIL_WALL if len(digits) > COUNT_DIGITS else min(int(digits or "0"), UNTIL_WALL)
+            tokens.append((TOKEN_COUNT, count, start))
+        else:
+            tokens.append((kind, char.upper(), i))
+            i += 1
+    return tokens
+
+
+def parse_tokens(tokens):
+    sequences = [[]]
+    openings = []
+    i, length = 0, len(tokens)
+    while i < length:
+        kind, value, position = tokens[i]
+        i += 1
+        if kind is TOKEN_MOVE:
+            steps = 1
+            if i < length and tokens[i][0] is TOKEN_COUNT:
+                steps = tokens[i][1]
+                i += 1
+            elif i < length and tokens[i][0] is TOKEN_STAR:
+                steps = UNTIL_WALL
+                i += 1
+            sequences[-1].append(IRInstruction("MOVE", value, steps))
+        elif kind is TOKEN_OPEN:
+            if len(openings) >= MAX_NESTING:
+                raise CommandSyntaxError(f"Repeats nested deeper than {MAX_NESTING}", position)
+            sequences.append([])
+            openings.append(position)
+        elif kind is TOKEN_CLOSE:
+            if len(sequences) == 1:
+                raise CommandSyntaxError("Unmatched ')'", position)
+            body = sequences.pop()
+            openings.pop()
+            count = 1
+            if i < length and tokens[i][0] is TOKEN_COUNT:
+                count = tokens[i][1]
+                i += 1
+            sequences[-1].append(IRInstruction("REPEAT", None, count, body))
+        else:
+            raise CommandSyntaxError(f"Invalid move: {value}", position)
+    if openings:
+        raise CommandSyntaxError("Missing ')'", openings[-1])
+    return sequences[0]
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_program(command):
+    return tuple(parse_tokens(tokenize(command)))
+
+
+def build_parse_tree(ir_list, parent=None):
+    from anytree import Node
+    if parent is None:
+        parent = Node("Command")
+    for instruction in ir_list:
+        if instruction.command == "MOVE":
+            move_node = Node("Move", parent=parent)
+            Node(f"Direction: {instruction.direction}", parent=move_node)
+            if instruction.steps == UNTIL_WALL:
+                Node("Steps: until wall", parent=move_node)
+            elif instruction.steps != 1:
+                Node(f"Steps: {instruction.steps}", parent=move_node)
+        elif instruction.command == "REPEAT":
+            repeat_node = Node("Repeat", parent=parent)
+            build_parse_tree(instruction.body, repeat_node)
+            Node(f"Count: {instruction.steps}", parent=repeat_node)
+    return parent
+
+
+@profiler.timed("parse_to_ir")
+def parse_to_ir(command, debug=None):
+    try:
+        ir_list = list(parse_program(command))
+    except CommandSyntaxError as e:
+        print(e)
+        return None
+
+    if PARSE_DEBUG if debug is None else debug:
+        print_parse_tree(build_parse_tree(ir_list))
+
+    return ir_list
+
+
+def iter_moves(ir_list):
+    for instruction in ir_list:
+        if instruction.command == "MOVE":
+            yield instruction.direction, instruction.steps
+        elif instruction.command == "REPEAT":
+            for _ in range(instruction.steps):
+                moved = False
+                for move in iter_moves(instruction.body):
+                    moved = True
+                    yield move
+                # A body that yields nothing once never will, however large the count.
+                if not moved:
+                    break
+
+
+def print_parse_tree(node, level=0):
+    indent = " " * (level * 4)
+    print(f"{indent}{node.name}")
+    for child in node.children:
+        print_parse_tree(child, level + 1)
+
+
+def remove_zero_moves(ir_list, maze=None, start=None, runs=None):
+    return [instruction for instruction in ir_list
+            if instruction.steps > 0 and (instruction.command != "REPEAT" or instruction.body)]
+
+
+def inline_single_repeats(ir_list, maze=None, start=None, runs=None):
+    inlined = []
+    for instruction in ir_list:
+        if instruction.command == "REPEAT" and instruction.steps == 1:
+            inlined.extend(instruction.body)
+        else:
+            inlined.append(instruction)
+    return inlined
+
+
+def merge_moves(ir_list, maze=None, start=None, runs=None):
+    merged = []
+    for instruction in ir_list:
+        previous = merged[-1] if merged else None
+        if (previous is not None and instruction.command == "MOVE" and previous.command == "MOVE"
+                and instruction.direction == previous.direction):
+            merged[-1] = IRInstruction("MOVE", previous.direction, min(previous.steps + instruction.steps, UNTIL_WALL))
+        else:
+            merged.append(instruction)
+    return merged
+
+
+def clamp_to_bounds(ir_list, maze=None, start=None, runs=None):
+    if maze is None:
+        return ir_list
+    if start is None:
+        min_x, max_x, min_y, max_y = 0, maze.cols - 1, 0, maze.rows - 1
+    else:
+        min_x = max_x = start[0]
+        min_y = max_y = start[1]
+
+    clamped = []
+    for instruction in ir_list:
+        if instruction.command == "REPEAT":
+            min_x, max_x, min_y, max_y = 0, maze.cols - 1, 0, maze.rows - 1
+        elif instruction.command == "MOVE":
+            dx, dy = DIRECTIONS[instruction.direction]
+            if dx > 0:
+                limit = maze.cols - 1 - min_x
+            elif dx < 0:
+                limit = max_x
+            elif dy > 0:
+                limit = maze.rows - 1 - min_y
+            else:
+                limit = max_y
+            steps = min(instruction.steps, limit)
+            if steps != instruction.steps:
+                instruction = IRInstruction("MOVE", instruction.direction, steps)
+
+            if dx > 0:
+                max_x = min(maze.cols - 1, max_x + steps)
+            elif dx < 0:
+                min_x = max(0, min_x - steps)
+            elif dy > 0:
+                max_y = min(maze.rows - 1, max_y + steps)
+            else:
+                min_y = max(0, min_y - steps)
+        clamped.append(instruction)
+    return clamped
+
+
+def reachable_steps(maze, x, y, direction, steps, runs=None):
+    dx, dy = DIRECTIONS[direction]
+    cardinal = CARDINAL_DIRECTIONS[direction]
+    if runs is not None:
+        return runs.reach(x, y, cardinal, steps)
+    taken = 0
+    while taken < steps and maze.can_move(x, y, cardinal):
+        x, y = x + dx, y + dy
+        taken += 1
+    return taken
+
+
+def cancel_opposite_moves(ir_list, maze=None, start=None, runs=None):
+    if maze is None or start is None:
+        return ir_list
+    x, y = start
+    result = []
+    for index, instruction in enumerate(ir_list):
+        if instruction.command != "MOVE":
+            result.extend(ir_list[index:])
+            break
+
+        direction = instruction.direction
+        steps = reachable_steps(maze, x, y, direction, instruction.steps, runs)
+        dx, dy = DIRECTIONS[direction]
+        x, y = x + dx * steps, y + dy * steps
+
+        while steps and result and result[-1].command == "MOVE" and result[-1].direction == OPPOSITE_MOVES[direction]:
+            previous = result.pop()
+            if previous.steps > steps:
+                result.append(IRInstruction("MOVE", previous.direction, previous.steps - steps))
+                steps = 0
+            else:
+                steps -= previous.steps
+        if steps:
+            if result and result[-1].command == "MOVE" and result[-1].direction == direction:
+                result[-1] = IRInstruction("MOVE", direction, min(result[-1].steps + steps, UNTIL_WALL))
+            else:
+                result.append(IRInstruction("MOVE", direction, steps))
+    return result
+
+
+SAFE_PASSES = (remove_zero_moves, inline_single_repeats, merge_moves, clamp_to_bounds)
+OPTIMIZATION_PASSES = SAFE_PASSES + (cancel_opposite_moves,)
+
+
+def optimize_ir(ir_list, maze=None, start=None, passes=OPTIMIZATION_PASSES, dump=None, runs=None):
+    if dump is None:
+        dump = DUMP_IR
+    if dump:
+        print("IR before optimization:", ir_list)
+
+    ir_list = [
+        IRInstruction("REPEAT", None, instruction.steps, optimize_ir(instruction.body, maze, None, passes, False, runs))
+        if instruction.command == "REPEAT" else instruction
+        for instruction in ir_list
+    ]
+    while True:
+        size = len(ir_list)
+        for optimization in passes:
+            ir_list = optimization(ir_list, maze, start, runs)
+            if dump:
+                print(f"  {optimization.__name__}:", ir_list)
+        if len(ir_list) >= size:
+            break
+
+    if dump:
+        print("IR after optimization:", ir_list)
+    return ir_list
+
+
+@profiler.timed("execute_ir")
+def execute_ir(ir_list, player_x, player_y, maze, runs=None, budget=INSTRUCTION_BUDGET):
+    for executed, (direction, steps) in enumerate(iter_moves(ir_list)):
+        if executed >= budget:
+            print("Instruction budget exhausted!")
+            break
+        dx, dy = DIRECTIONS[direction]
+
+        if runs is not None:
+            taken = runs.reach(player_x, player_y, CARDINAL_DIRECTIONS[direction], steps)
+            player_x, player_y = player_x + dx * taken, player_y + dy * taken
+            if taken < steps:
+                print("Wall encountered!")
+            continue
+
+        for _ in range(steps):
+            new_x, new_y = player_x + dx, player_y + dy
+
+            if maze.can_move(player_x, player_y, CARDINAL_DIRECTIONS[direction]):
+                player_x, player_y = new_x, new_y
+            else:
+                print("Wall encountered!")
+                break
+
+    return player_x, player_y
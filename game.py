@@ -0,0 +1,192 @@
+import random
+
+from analysis import DistanceField, RunLengths
+from compiler import (CARDINAL_DIRECTIONS, DIRECTIONS, INSTRUCTION_BUDGET, SAFE_PASSES, CommandSyntaxError,
+                      iter_moves, optimize_ir, parse_program)
+from generators import generate_maze
+from profiler import profiler
+
+ROWS, COLS = 6, 6
+MAX_GROWTH = 5
+FINAL_LEVEL = 15
+START_HINTS = 5
+START_REVEALS = 3
+MIN_START_DISTANCE = 3
+
+MISSED = "missed"
+REACHED = "reached"
+WON = "won"
+FAILED = "failed"
+REJECTED = "rejected"
+
+HINT_WALL = "wall"
+HINT_TOWARD = "toward"
+HINT_AWAY = "away"
+
+
+def level_size(level):
+    x = min(level - 1, MAX_GROWTH)
+    return ROWS + x, COLS + x
+
+
+def level_attempts(level):
+    return min(4 + level, 10)
+
+
+class Level:
+    __slots__ = ('number', 'maze', 'runs', 'field', 'start', 'end', 'red', 'green')
+
+    def __init__(self, number, maze, runs, field, start, end, red, green):
+        self.number = number
+        self.maze = maze
+        self.runs = runs
+        self.field = field
+        self.start = start
+        self.end = end
+        self.red = red
+        self.green = green
+
+
+def build_level(number, seed=None):
+    rng = random.Random(seed)
+    rows, cols = level_size(number)
+    maze = generate_maze(rows, cols, seed=rng.getrandbits(32))
+    end = (rng.randrange(cols), rng.randrange(rows))
+    field = DistanceField(maze, end)
+    start = field.pick(rng, min(MIN_START_DISTANCE + number, field.farthest))
+    red = field.pick(rng, 1, exclude={start}) if rng.randint(1, 3) == 1 else None
+    green = field.pick(rng, 1, exclude={start, red}) if rng.randint(1, 5) == 1 else None
+    return Level(number, maze, RunLengths(maze), field, start, end, red, green)
+
+
+def compile_command(command):
+    try:
+        return parse_program(command), None
+    except CommandSyntaxError as e:
+        return None, str(e)
+
+
+class GameState:
+    __slots__ = ('rng', 'log', 'loader', 'next_seed', 'level', 'maze', 'runs', 'field', 'player', 'end', 'red',
+                 'green', 'hints', 'reveals', 'attempts', 'over')
+
+    def __init__(self, seed=None, level=1, log=None, loader=build_level):
+        self.rng = random.Random(seed)
+        self.log = log
+        self.loader = loader
+        self.hints = START_HINTS
+        self.reveals = START_REVEALS
+        self.over = False
+        self.next_seed = self.rng.getrandbits(32)
+        self.enter_level(self.loader(level, self.next_seed))
+
+    def say(self, message):
+        if self.log is not None:
+            self.log(message)
+
+    def upcoming(self):
+        return self.level + 1, self.next_seed
+
+    def enter_level(self, level):
+        self.level = level.number
+        self.maze = level.maze
+        self.runs = level.runs
+        self.field = level.field
+        self.player = level.start
+        self.end = level.end
+        self.red = level.red
+        self.green = level.green
+        self.attempts = level_attempts(level.number)
+        self.next_seed = self.rng.getrandbits(32)
+
+    def use_reveal(self):
+        if self.reveals <= 0:
+            return False
+        self.reveals -= 1
+        return True
+
+    def use_hint(self, direction):
+        if self.hints <= 0:
+            return None
+        self.hints -= 1
+        x, y = self.player
+        dx, dy = DIRECTIONS[direction]
+        cardinal = CARDINAL_DIRECTIONS[direction]
+        if not self.maze.in_bounds(x + dx, y + dy) or self.maze.has_wall(x, y, cardinal):
+            return HINT_WALL
+        if self.field.next_move(x, y) == cardinal:
+            self.say("That way leads toward the end.")
+            return HINT_TOWARD
+        self.say("That way leads away from the end.")
+        return HINT_AWAY
+
+    def collect_items(self):
+        if self.player == self.green:
+            self.hints += 1
+            self.green = None
+            self.say("You collected the green circle! Hint1 increased.")
+
+        if self.player == self.red:
+            self.reveals += 1
+            self.red = None
+            self.say("You collected the red circle! Hint2 increased.")
+
+    def finish_level(self):
+        self.say("End achieved!")
+        if self.level >= FINAL_LEVEL:
+            self.over = True
+            self.say("Game finished")
+            return WON
+        self.enter_level(self.loader(*self.upcoming()))
+        return REACHED
+
+    def run(self, command):
+        if self.over:
+            return REJECTED
+        self.attempts -= 1
+        if self.attempts <= 0:
+            self.over = True
+            self.say("Failure! No attempts left.")
+            self.say(f"Shortest route from here: {self.field.command(*self.player)}")
+            return FAILED
+
+        with profiler.section("parse"):
+            ir_list, error = compile_command(command)
+        if error is not None:
+            self.say(error)
+        if not ir_list:
+            self.say("No valid commands found in input.")
+            return MISSED
+
+        with profiler.section("optimize"):
+            ir_list = optimize_ir(ir_list, self.maze, self.player, passes=SAFE_PASSES, runs=self.runs)
+        for executed, (direction, steps) in enumerate(iter_moves(ir_list)):
+            if executed >= INSTRUCTION_BUDGET:
+                self.say("Instruction budget exhausted!")
+                break
+
+            dx, dy = DIRECTIONS[direction]
+            reachable = self.runs.reach(*self.player, CARDINAL_DIRECTIONS[direction], steps)
+            for _ in range(reachable):
+                yield direction
+                x, y = self.player
+                self.player = (x + dx, y + dy)
+                self.collect_items()
+                if self.player == self.end:
+                    return self.finish_level()
+
+            if reachable < steps:
+                profiler.count("wall_hits")
+                self.say("Wall encountered!")
+
+        if self.player == self.end:
+            return self.finish_level()
+        return MISSED
+
+    def step(self, command):
+        moves = self.run(command)
+        while True:
+            try:
+                next(moves)
+            except StopIteration as stop:
+                return stop.value
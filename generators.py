@@ -0,0 +1,192 @@
+import random
+from array import array
+
+from maze import Maze, WALL_N, WALL_S, WALL_E, WALL_W, OPPOSITE_BITS
+from profiler import profiler
+
+
+def _carve_dfs(maze, rng):
+    rows, cols, cells = maze.rows, maze.cols, maze.cells
+    last_row = (rows - 1) * cols
+    random_ = rng.random
+    visited = bytearray(rows * cols)
+    bits = [0, 0, 0, 0]
+    targets = [0, 0, 0, 0]
+
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        i = stack[-1]
+        x = i % cols
+        n = 0
+        if i >= cols and not visited[i - cols]:
+            bits[n] = WALL_N
+            targets[n] = i - cols
+            n += 1
+        if i < last_row and not visited[i + cols]:
+            bits[n] = WALL_S
+            targets[n] = i + cols
+            n += 1
+        if x and not visited[i - 1]:
+            bits[n] = WALL_W
+            targets[n] = i - 1
+            n += 1
+        if x < cols - 1 and not visited[i + 1]:
+            bits[n] = WALL_E
+            targets[n] = i + 1
+            n += 1
+
+        if n:
+            k = int(random_() * n)
+            bit = bits[k]
+            j = targets[k]
+            cells[i] &= ~bit
+            cells[j] &= ~OPPOSITE_BITS[bit]
+            visited[j] = 1
+            stack.append(j)
+        else:
+            stack.pop()
+
+
+def _carve_wilson(maze, rng):
+    rows, cols, cells = maze.rows, maze.cols, maze.cells
+    total = rows * cols
+    random_ = rng.random
+    offsets = {WALL_N: -cols, WALL_S: cols, WALL_E: 1, WALL_W: -1}
+    choices = (WALL_N, WALL_S, WALL_E, WALL_W)
+    in_maze = bytearray(total)
+    exits = bytearray(total)
+
+    in_maze[int(random_() * total)] = 1
+    for start in range(total):
+        if in_maze[start]:
+            continue
+
+        i = start
+        while not in_maze[i]:
+            x = i % cols
+            while True:
+                bit = choices[int(random_() * 4)]
+                if bit == WALL_N and i >= cols:
+                    break
+                if bit == WALL_S and i + cols < total:
+                    break
+                if bit == WALL_E and x < cols - 1:
+                    break
+                if bit == WALL_W and x:
+                    break
+            exits[i] = bit
+            i += offsets[bit]
+
+        i = start
+        while not in_maze[i]:
+            bit = exits[i]
+            j = i + offsets[bit]
+            cells[i] &= ~bit
+            cells[j] &= ~OPPOSITE_BITS[bit]
+            in_maze[i] = 1
+            i = j
+
+
+def _carve_kruskal(maze, rng):
+    rows, cols, cells = maze.rows, maze.cols, maze.cells
+    parent = array('l', range(rows * cols))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edges = array('l', (
+        i * 2 + south
+        for i in range(rows * cols)
+        for south in (0, 1)
+        if (south and i + cols < rows * cols) or (not south and i % cols < cols - 1)
+    ))
+    rng.shuffle(edges)
+
+    remaining = rows * cols - 1
+    for edge in edges:
+        i = edge >> 1
+        if edge & 1:
+            j = i + cols
+            bit = WALL_S
+        else:
+            j = i + 1
+            bit = WALL_E
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        parent[root_j] = root_i
+        cells[i] &= ~bit
+        cells[j] &= ~OPPOSITE_BITS[bit]
+        remaining -= 1
+        if not remaining:
+            break
+
+
+def _carve_eller(maze, rng):
+    rows, cols, cells = maze.rows, maze.cols, maze.cells
+    random_ = rng.random
+    row_sets = list(range(cols))
+    members = {s: [s] for s in range(cols)}
+    next_set = cols
+
+    for y in range(rows):
+        base = y * cols
+        last = y == rows - 1
+
+        for x in range(cols - 1):
+            a, b = row_sets[x], row_sets[x + 1]
+            if a == b or not (last or random_() < 0.5):
+                continue
+            cells[base + x] &= ~WALL_E
+            cells[base + x + 1] &= ~WALL_W
+            if len(members[a]) < len(members[b]):
+                a, b = b, a
+            moved = members.pop(b)
+            for column in moved:
+                row_sets[column] = a
+            members[a].extend(moved)
+
+        if last:
+            break
+
+        next_row_sets = [-1] * cols
+        next_members = {}
+        for set_id, columns in members.items():
+            forced = columns[int(random_() * len(columns))]
+            carried = [column for column in columns if column == forced or random_() < 0.5]
+            for column in carried:
+                cells[base + column] &= ~WALL_S
+                cells[base + cols + column] &= ~WALL_N
+                next_row_sets[column] = set_id
+            next_members[set_id] = carried
+
+        for column in range(cols):
+            if next_row_sets[column] < 0:
+                next_row_sets[column] = next_set
+                next_members[next_set] = [column]
+                next_set += 1
+
+        row_sets, members = next_row_sets, next_members
+
+
+ALGORITHMS = {
+    'dfs': _carve_dfs,
+    'wilson': _carve_wilson,
+    'kruskal': _carve_kruskal,
+    'eller': _carve_eller,
+}
+
+
+@profiler.timed("generate_maze")
+def generate_maze(rows, cols, algorithm='dfs', seed=None):
+    try:
+        carve = ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown maze algorithm: {algorithm}") from None
+    maze = Maze(rows, cols)
+    carve(maze, random.Random(seed))
+    return maze
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+
+import pygame
+
+from profiler import profiler
+
+
+class TextCache:
+    def __init__(self, font, capacity=256):
+        self.font = font
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def render(self, text, color):
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            profiler.count("text_renders")
+            surface = self.font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+class Label:
+    __slots__ = ('pos', 'color', 'text', 'surface')
+
+    def __init__(self, pos, color, text, surface):
+        self.pos = pos
+        self.color = color
+        self.text = text
+        self.surface = surface
+
+
+class Hud:
+    def __init__(self, font, background):
+        self.texts = TextCache(font)
+        self.background = background
+        self.labels = {}
+        self.boxes = []
+        self.changed = []
+
+    def add_label(self, name, pos, color, text=""):
+        self.labels[name] = Label(pos, color, text, self.texts.render(text, color))
+
+    def add_box(self, rect, color, width=0):
+        self.boxes.append((rect, color, width))
+
+    def set_text(self, name, text):
+        label = self.labels[name]
+        if label.text != text:
+            old_rect = label.surface.get_rect(topleft=label.pos)
+            label.text = text
+            label.surface = self.texts.render(text, label.color)
+            self.changed.append(old_rect.union(label.surface.get_rect(topleft=label.pos)))
+
+    def draw(self, surface):
+        for rect, color, width in self.boxes:
+            pygame.draw.rect(surface, color, rect, width)
+        for label in self.labels.values():
+            surface.blit(label.surface, label.pos)
+        self.changed = []
+
+    def draw_changed(self, surface):
+        rects = self.changed
+        for rect in rects:
+            surface.set_clip(rect)
+            surface.fill(self.background)
+            for box, color, width in self.boxes:
+                if rect.colliderect(box):
+                    pygame.draw.rect(surface, color, box, width)
+            for label in self.labels.values():
+                surface.blit(label.surface, label.pos)
+        surface.set_clip(None)
+        self.changed = []
+        return rects
+
+
+class Overlay:
+    def __init__(self, font, pos, color, background):
+        self.font = font
+        self.pos = pos
+        self.color = color
+        self.background = background
+        self.text = None
+        self.surface = None
+        self.rect = pygame.Rect(pos, (0, 0))
+        self.changed = False
+
+    def set_text(self, text):
+        if text == self.text:
+            return None
+        stale = self.rect
+        self.text = text
+        self.surface = self.font.render(text, True, self.color, self.background) if text else None
+        self.rect = self.surface.get_rect(topleft=self.pos) if self.surface else pygame.Rect(self.pos, (0, 0))
+        self.changed = True
+        return stale
+
+    def draw(self, surface, rects=None):
+        if self.surface is None:
+            return []
+        if not self.changed and rects is not None and self.rect.collidelist(rects) < 0:
+            return []
+        self.changed = False
+        surface.blit(self.surface, self.rect)
+        return [self.rect]
@@ -0,0 +1,165 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis import UNREACHABLE, DistanceField, RunLengths
+from game import FINAL_LEVEL, MIN_START_DISTANCE, Level, build_level
+from maze import Maze
+
+MAGIC = b"MZPK"
+VERSION = 1
+NO_POSITION = 0xFFFF
+
+HEADER = struct.Struct("<4sHHI")
+INDEX_ENTRY = struct.Struct("<QHH")
+RECORD = struct.Struct("<I11H")
+
+LOW_NIBBLES = bytes(byte & 0x0F for byte in range(256))
+HIGH_NIBBLES = bytes(byte >> 4 for byte in range(256))
+
+
+def pack_walls(cells):
+    if len(cells) % 2:
+        cells = cells + b"\x00"
+    return bytes(low | high << 4 for low, high in zip(cells[0::2], cells[1::2]))
+
+
+def unpack_walls(packed, count):
+    cells = bytearray(len(packed) * 2)
+    cells[0::2] = packed.translate(LOW_NIBBLES)
+    cells[1::2] = packed.translate(HIGH_NIBBLES)
+    del cells[count:]
+    return cells
+
+
+def encode_level(level, seed):
+    def position(point):
+        return point if point is not None else (NO_POSITION, NO_POSITION)
+
+    maze = level.maze
+    return RECORD.pack(seed, level.number, maze.rows, maze.cols, *level.start, *level.end,
+                       *position(level.red), *position(level.green)) + pack_walls(maze.cells)
+
+
+def validate_level(level):
+    field = level.field
+    if any(distance == UNREACHABLE for distance in field.distances):
+        raise ValueError(f"Level {level.number} has cells that cannot reach the end")
+    if field.distance(*level.start) < min(MIN_START_DISTANCE + level.number, field.farthest):
+        raise ValueError(f"Level {level.number} starts too close to the end")
+    for item in (level.red, level.green):
+        if item is not None and item in (level.start, level.end):
+            raise ValueError(f"Level {level.number} has a bonus on the start or end cell")
+
+
+def bake_level(job):
+    number, seed = job
+    level = build_level(number, seed)
+    validate_level(level)
+    return encode_level(level, seed)
+
+
+def write_pack(path, records, numbers):
+    offset = HEADER.size + INDEX_ENTRY.size * len(records)
+    index = []
+    for record, number in zip(records, numbers):
+        index.append(INDEX_ENTRY.pack(offset, number, 0))
+        offset += len(record)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records)))
+        f.write(b"".join(index))
+        f.write(b"".join(records))
+
+
+def bake_pack(path, levels, variants, seed=0, workers=None):
+    jobs = [(number, (seed * 1_000_003 + number * variants + variant) & 0xFFFFFFFF)
+            for number in range(1, levels + 1) for variant in range(variants)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        records = list(pool.map(bake_level, jobs, chunksize=16))
+    write_pack(path, records, [number for number, _ in jobs])
+    return len(records)
+
+
+class LevelPack:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level pack")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported level pack version {version}")
+        self.count = count
+        self.variants = {}
+        for i in range(count):
+            _, number, _ = INDEX_ENTRY.unpack_from(self.data, HEADER.size + i * INDEX_ENTRY.size)
+            self.variants.setdefault(number, []).append(i)
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def record(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(f"Level pack index {i} out of range")
+        offset, _, _ = INDEX_ENTRY.unpack_from(self.data, HEADER.size + i * INDEX_ENTRY.size)
+        fields = RECORD.unpack_from(self.data, offset)
+        rows, cols = fields[2], fields[3]
+        start = offset + RECORD.size
+        packed = self.data[start:start + (rows * cols + 1) // 2]
+        return fields, unpack_walls(packed, rows * cols)
+
+    def level(self, i):
+        fields, cells = self.record(i)
+        _, number, rows, cols, start_x, start_y, end_x, end_y, red_x, red_y, green_x, green_y = fields
+        maze = Maze(rows, cols, cells)
+        red = (red_x, red_y) if red_x != NO_POSITION else None
+        green = (green_x, green_y) if green_x != NO_POSITION else None
+        return Level(number, maze, RunLengths(maze), DistanceField(maze, (end_x, end_y)), (start_x, start_y),
+                     (end_x, end_y), red, green)
+
+    def load(self, number, seed=None):
+        variants = self.variants.get(number)
+        if not variants:
+            return build_level(number, seed)
+        return self.level(variants[(seed or 0) % len(variants)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake and inspect maze level packs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bake_parser = subparsers.add_parser("bake", help="generate, validate and write a level pack")
+    bake_parser.add_argument("path")
+    bake_parser.add_argument("--levels", type=int, default=FINAL_LEVEL)
+    bake_parser.add_argument("--variants", type=int, default=100)
+    bake_parser.add_argument("--seed", type=int, default=0)
+    bake_parser.add_argument("--workers", type=int, default=None)
+
+    info_parser = subparsers.add_parser("info", help="summarize a level pack")
+    info_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "bake":
+        start = time.perf_counter()
+        count = bake_pack(args.path, args.levels, args.variants, args.seed, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"baked {count} levels into {args.path} ({os.path.getsize(args.path):,} bytes) "
+              f"in {elapsed:.2f} s, {count / elapsed:,.0f} levels/sec")
+    else:
+        pack = LevelPack(args.path)
+        print(f"{args.path}: {len(pack)} levels")
+        for number, variants in sorted(pack.variants.items()):
+            fields, _ = pack.record(variants[0])
+            print(f"level {number:>3}  {len(variants):>5} variants  {fields[2]}x{fields[3]}")
+        pack.close()
+
+
+if __name__ == "__main__":
+    main()
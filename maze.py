@@ -0,0 +1,51 @@
+WALL_N = 1
+WALL_S = 2
+WALL_E = 4
+WALL_W = 8
+ALL_WALLS = WALL_N | WALL_S | WALL_E | WALL_W
+
+WALL_BITS = {'N': WALL_N, 'S': WALL_S, 'E': WALL_E, 'W': WALL_W}
+OPPOSITE_BITS = {WALL_N: WALL_S, WALL_S: WALL_N, WALL_E: WALL_W, WALL_W: WALL_E}
+CARDINAL_DELTAS = {'N': (0, -1), 'S': (0, 1), 'E': (1, 0), 'W': (-1, 0)}
+
+
+class Maze:
+    __slots__ = ('rows', 'cols', 'cells')
+
+    def __init__(self, rows, cols, cells=None):
+        if cells is None:
+            cells = bytearray([ALL_WALLS]) * (rows * cols)
+        elif len(cells) != rows * cols:
+            raise ValueError(f"Expected {rows * cols} cells, got {len(cells)}")
+        self.rows = rows
+        self.cols = cols
+        self.cells = cells
+
+    def __repr__(self):
+        return f"Maze({self.rows}x{self.cols})"
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def walls(self, x, y):
+        return self.cells[y * self.cols + x]
+
+    def has_wall(self, x, y, direction):
+        return self.cells[y * self.cols + x] & WALL_BITS[direction] != 0
+
+    def can_move(self, x, y, direction):
+        dx, dy = CARDINAL_DELTAS[direction]
+        return self.in_bounds(x + dx, y + dy) and not self.cells[y * self.cols + x] & WALL_BITS[direction]
+
+    def carve(self, x, y, direction):
+        dx, dy = CARDINAL_DELTAS[direction]
+        bit = WALL_BITS[direction]
+        self.cells[y * self.cols + x] &= ~bit
+        self.cells[(y + dy) * self.cols + x + dx] &= ~OPPOSITE_BITS[bit]
+
+    def row(self, y):
+        start = y * self.cols
+        return memoryview(self.cells)[start:start + self.cols]
+
+    def column(self, x):
+        return self.cells[x::self.cols]
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LevelBundle:
+    __slots__ = ('level', 'cell_size', 'animations', 'layer')
+
+    def __init__(self, level, cell_size, animations, layer):
+        self.level = level
+        self.cell_size = cell_size
+        self.animations = animations
+        self.layer = layer
+
+
+class LevelPipeline:
+    def __init__(self, build):
+        self.build = build
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-prefetch")
+        self.pending = {}
+
+    def prefetch(self, number, seed):
+        key = (number, seed)
+        if key not in self.pending:
+            self.pending[key] = self.executor.submit(self.build, number, seed)
+
+    def ready(self, number, seed):
+        future = self.pending.get((number, seed))
+        return future is not None and future.done()
+
+    def take(self, number, seed):
+        future = self.pending.pop((number, seed), None)
+        for stale in self.pending.values():
+            stale.cancel()
+        self.pending.clear()
+        if future is None:
+            return self.build(number, seed)
+        return future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
@@ -0,0 +1,162 @@
+import functools
+import json
+import math
+import os
+import time
+from array import array
+
+PROFILE = os.environ.get("MAZE_PROFILE") == "1"
+PROFILE_OVERLAY = os.environ.get("MAZE_PROFILE_OVERLAY") == "1"
+PROFILE_JSON = os.environ.get("MAZE_PROFILE_JSON")
+
+# Log-scale buckets from 1 us upwards, 8 per doubling (about 9% wide).
+SMALLEST = 1e-6
+STEPS_PER_DOUBLING = 8
+BUCKETS = 8 * 32
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'largest')
+
+    def __init__(self):
+        self.counts = array('L', [0]) * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.largest = 0.0
+
+    def add(self, seconds):
+        if seconds > SMALLEST:
+            bucket = min(BUCKETS - 1, int(math.log2(seconds / SMALLEST) * STEPS_PER_DOUBLING))
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.largest:
+            self.largest = seconds
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.largest, SMALLEST * 2 ** ((bucket + 1) / STEPS_PER_DOUBLING))
+        return self.largest
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 4),
+            "p95_ms": round(self.percentile(0.95) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.largest * 1000, 4),
+        }
+
+
+class Section:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+        return False
+
+
+class NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class Profiler:
+    def __init__(self, enabled=PROFILE):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.sections = {}
+        self.started = time.time()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).add(seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self.histogram(name))
+        return section
+
+    def timed(self, name):
+        def decorate(function):
+            if not self.enabled:
+                return function
+            histogram = self.histogram(name)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    histogram.add(time.perf_counter() - start)
+
+            return wrapper
+
+        return decorate
+
+    def overlay_text(self, name="frame"):
+        histogram = self.histograms.get(name)
+        if histogram is None or not histogram.count:
+            return ""
+        summary = histogram.summary()
+        return (f"{name} p50 {summary['p50_ms']:.1f} p95 {summary['p95_ms']:.1f} "
+                f"p99 {summary['p99_ms']:.1f} ms")
+
+    def snapshot(self):
+        return {
+            "started": self.started,
+            "duration_s": time.time() - self.started,
+            "timers": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())
+                       if histogram.count},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def export(self, path=None):
+        if path is None:
+            path = time.strftime("maze-profile-%Y%m%d-%H%M%S.json", time.localtime(self.started))
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+profiler = Profiler()
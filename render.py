@@ -0,0 +1,309 @@
+from collections import OrderedDict
+
+import pygame
+
+from maze import WALL_N, WALL_S, WALL_E, WALL_W
+from profiler import profiler
+
+WALL_WIDTH = 2
+COLOR_KEY = (255, 0, 255)
+
+
+def draw_walls(surface, maze, cell_size, color, area=None, origin=(0, 0)):
+    profiler.count("draw_walls")
+    x0, y0, x1, y1 = area or (0, 0, maze.cols, maze.rows)
+    origin_x, origin_y = origin
+    for y in range(y0, y1):
+        top = y * cell_size + origin_y
+        bottom = top + cell_size
+        row = maze.row(y)
+        for x in range(x0, x1):
+            walls = row[x]
+            left = x * cell_size + origin_x
+            right = left + cell_size
+            if walls & WALL_N:
+                pygame.draw.line(surface, color, (left, top), (right, top), WALL_WIDTH)
+            if walls & WALL_S:
+                pygame.draw.line(surface, color, (left, bottom), (right, bottom), WALL_WIDTH)
+            if walls & WALL_W:
+                pygame.draw.line(surface, color, (left, top), (left, bottom), WALL_WIDTH)
+            if walls & WALL_E:
+                pygame.draw.line(surface, color, (right, top), (right, bottom), WALL_WIDTH)
+
+
+class WallLayer:
+    def __init__(self, colors):
+        self.colors = colors
+        self.maze = None
+        self.cell_size = None
+        self.surfaces = {}
+
+    def invalidate(self):
+        self.maze = None
+        self.cell_size = None
+        self.surfaces = {}
+
+    def build(self, maze, cell_size):
+        size = (maze.cols * cell_size + WALL_WIDTH, maze.rows * cell_size + WALL_WIDTH)
+        surfaces = {}
+        for color in self.colors:
+            surface = pygame.Surface(size)
+            surface.fill(COLOR_KEY)
+            draw_walls(surface, maze, cell_size, color)
+            surface.set_colorkey(COLOR_KEY, pygame.RLEACCEL)
+            surfaces[color] = surface
+        self.maze = maze
+        self.cell_size = cell_size
+        self.surfaces = surfaces
+
+    def get(self, maze, cell_size, color):
+        if maze is not self.maze or cell_size != self.cell_size:
+            self.build(maze, cell_size)
+        return self.surfaces[color]
+
+    def blit(self, surface, maze, cell_size, color, area, offset):
+        surface.blit(self.get(maze, cell_size, color), (-offset[0], -offset[1]))
+
+
+class ChunkCache:
+    def __init__(self, colors, chunk_cells=16, capacity=64):
+        self.colors = colors
+        self.chunk_cells = chunk_cells
+        self.capacity = capacity
+        self.maze = None
+        self.cell_size = None
+        self.chunks = OrderedDict()
+
+    def invalidate(self):
+        self.maze = None
+        self.cell_size = None
+        self.chunks.clear()
+
+    def chunk(self, cx, cy, color):
+        key = (cx, cy, color)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+
+        maze, cell_size, n = self.maze, self.cell_size, self.chunk_cells
+        x0, y0 = cx * n, cy * n
+        x1, y1 = min(x0 + n, maze.cols), min(y0 + n, maze.rows)
+        surface = pygame.Surface(((x1 - x0) * cell_size + 2 * WALL_WIDTH, (y1 - y0) * cell_size + 2 * WALL_WIDTH))
+        surface.fill(COLOR_KEY)
+        origin = (WALL_WIDTH - x0 * cell_size, WALL_WIDTH - y0 * cell_size)
+        draw_walls(surface, maze, cell_size, color, (x0, y0, x1, y1), origin)
+        surface.set_colorkey(COLOR_KEY, pygame.RLEACCEL)
+
+        self.chunks[key] = surface
+        if len(self.chunks) > self.capacity:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def use(self, maze, cell_size):
+        if maze is not self.maze or cell_size != self.cell_size:
+            self.invalidate()
+            self.maze = maze
+            self.cell_size = cell_size
+
+    def chunks_in(self, area):
+        span = self.chunk_cells * self.cell_size
+        last_cx = (self.maze.cols - 1) // self.chunk_cells
+        last_cy = (self.maze.rows - 1) // self.chunk_cells
+        cx0 = max(0, (area.left - WALL_WIDTH) // span)
+        cx1 = min(last_cx, (area.right + WALL_WIDTH) // span)
+        cy0 = max(0, (area.top - WALL_WIDTH) // span)
+        cy1 = min(last_cy, (area.bottom + WALL_WIDTH) // span)
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+
+    def warm(self, maze, cell_size, area):
+        self.use(maze, cell_size)
+        for cx, cy in self.chunks_in(area):
+            for color in self.colors:
+                self.chunk(cx, cy, color)
+
+    def blit(self, surface, maze, cell_size, color, area, offset):
+        self.use(maze, cell_size)
+        span = self.chunk_cells * cell_size
+        for cx, cy in self.chunks_in(area):
+            position = (cx * span - WALL_WIDTH - offset[0], cy * span - WALL_WIDTH - offset[1])
+            surface.blit(self.chunk(cx, cy, color), position)
+
+
+class MazeRenderer:
+    def __init__(self, surface, view_size, background, visible_color, hidden_color):
+        self.surface = surface
+        self.view = pygame.Rect((0, 0), view_size)
+        self.background = background
+        self.colors = (hidden_color, visible_color)
+        self.wall_layer = WallLayer(self.colors)
+        self.chunks = ChunkCache(self.colors)
+        self.layer = self.wall_layer
+        self.world = pygame.Rect(0, 0, 0, 0)
+        self.maze = None
+        self.cell_size = 0
+        self.visibility = bytearray()
+        self.explored = bytearray()
+        self.shown = False
+        self.uniform = True
+        self.dirty = bytearray()
+        self.sprites = []
+        self.full = True
+
+    def fits(self, maze, cell_size):
+        return maze.cols * cell_size <= self.view.width and maze.rows * cell_size <= self.view.height
+
+    def prepare_layer(self, maze, cell_size, focus=(0, 0)):
+        if self.fits(maze, cell_size):
+            layer = WallLayer(self.colors)
+            layer.build(maze, cell_size)
+        else:
+            layer = ChunkCache(self.colors)
+            layer.warm(maze, cell_size, self.view.move(focus[0] - self.view.centerx, focus[1] - self.view.centery))
+        return layer
+
+    def reset(self, maze, cell_size, visible=False, layer=None):
+        self.maze = maze
+        self.cell_size = cell_size
+        self.world = pygame.Rect(0, 0, maze.cols * cell_size, maze.rows * cell_size)
+        if layer is None:
+            layer = self.wall_layer if self.fits(maze, cell_size) else self.chunks
+        elif isinstance(layer, WallLayer):
+            self.wall_layer = layer
+        else:
+            self.chunks = layer
+        self.layer = layer
+        self.view.topleft = (0, 0)
+        self.visibility = bytearray([1 if visible else 0]) * (maze.rows * maze.cols)
+        self.explored = bytearray(maze.rows * maze.cols)
+        self.shown = visible
+        self.uniform = True
+        self.dirty = bytearray(maze.rows * maze.cols)
+        self.sprites = []
+        self.full = True
+
+    def follow(self, x, y):
+        left = min(max(0, int(x) - self.view.width // 2), max(0, self.world.width - self.view.width))
+        top = min(max(0, int(y) - self.view.height // 2), max(0, self.world.height - self.view.height))
+        if (left, top) != self.view.topleft:
+            self.view.topleft = (left, top)
+            self.full = True
+
+    def set_visible(self, visible):
+        self.shown = visible
+        visibility = bytearray(b'\x01') * len(self.explored) if visible else bytearray(self.explored)
+        if visibility != self.visibility:
+            self.visibility = visibility
+            self.uniform = not visibility or visibility.find(1 - visibility[0]) < 0
+            self.full = True
+
+    def reveal_cell(self, x, y, visible=True):
+        i = y * self.maze.cols + x
+        value = 1 if visible else 0
+        self.explored[i] = value
+        if not self.shown and self.visibility[i] != value:
+            self.visibility[i] = value
+            self.uniform = False
+            cell_size = self.cell_size
+            self.mark_rect(pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size))
+
+    def mark_rect(self, rect):
+        cols, rows, cell_size = self.maze.cols, self.maze.rows, self.cell_size
+        left = max(0, (rect.left - WALL_WIDTH) // cell_size)
+        right = min(cols - 1, (rect.right + WALL_WIDTH) // cell_size)
+        top = max(0, (rect.top - WALL_WIDTH) // cell_size)
+        bottom = min(rows - 1, (rect.bottom + WALL_WIDTH) // cell_size)
+        for y in range(top, bottom + 1):
+            start = y * cols
+            self.dirty[start + left:start + right + 1] = b'\x01' * (right - left + 1)
+
+    def _run_rect(self, x, y, length):
+        cell_size = self.cell_size
+        return pygame.Rect(x * cell_size - WALL_WIDTH, y * cell_size - WALL_WIDTH,
+                           length * cell_size + 2 * WALL_WIDTH, cell_size + 2 * WALL_WIDTH)
+
+    def _dirty_runs(self):
+        cols, dirty = self.maze.cols, self.dirty
+        runs = []
+        i = dirty.find(1)
+        while i >= 0:
+            y, x = divmod(i, cols)
+            end = dirty.find(0, i, (y + 1) * cols)
+            if end < 0:
+                end = (y + 1) * cols
+            dirty[i:end] = bytes(end - i)
+            runs.append(self._run_rect(x, y, end - i))
+            i = dirty.find(1, end)
+        return runs
+
+    def _visible_runs(self, rect):
+        # Revealed cells that reach into rect; their walls win over hidden neighbours.
+        cols, cell_size, visibility = self.maze.cols, self.cell_size, self.visibility
+        left = max(0, (rect.left - WALL_WIDTH) // cell_size)
+        right = min(cols, (rect.right + WALL_WIDTH) // cell_size + 1)
+        top = max(0, (rect.top - WALL_WIDTH) // cell_size)
+        bottom = min(self.maze.rows, (rect.bottom + WALL_WIDTH) // cell_size + 1)
+        for y in range(top, bottom):
+            row = y * cols
+            i = visibility.find(1, row + left, row + right)
+            while i >= 0:
+                end = visibility.find(0, i, row + right)
+                if end < 0:
+                    end = row + right
+                yield self._run_rect(i - row, y, end - i)
+                i = visibility.find(1, end, row + right)
+
+    def _redraw(self, runs, sprites):
+        surface = self.surface
+        offset_x, offset_y = self.view.topleft
+        screen_view = pygame.Rect((0, 0), self.view.size)
+        hidden, visible = self.colors
+        rects = []
+        for rect in runs:
+            rect = rect.move(-offset_x, -offset_y).clip(screen_view)
+            if not rect:
+                continue
+            world = rect.move(offset_x, offset_y)
+            surface.set_clip(rect)
+            surface.fill(self.background)
+            self.layer.blit(surface, self.maze, self.cell_size, hidden, world, self.view.topleft)
+            for run in self._visible_runs(world):
+                area = run.clip(world)
+                surface.set_clip(area.move(-offset_x, -offset_y))
+                self.layer.blit(surface, self.maze, self.cell_size, visible, area, self.view.topleft)
+            surface.set_clip(rect)
+            for image, (x, y) in sprites:
+                surface.blit(image, (x - offset_x, y - offset_y))
+            rects.append(rect)
+        surface.set_clip(None)
+        return rects
+
+    def render(self, sprites):
+        if sprites != self.sprites:
+            for image, pos in set(self.sprites).symmetric_difference(sprites):
+                self.mark_rect(image.get_rect(topleft=pos))
+            self.sprites = sprites
+
+        if not self.full:
+            rects = self._redraw(self._dirty_runs(), sprites)
+            profiler.count("dirty_rects", len(rects))
+            return rects
+
+        self.full = False
+        profiler.count("full_redraws")
+        self.surface.fill(self.background)
+        if self.uniform:
+            self._dirty_runs()
+            offset_x, offset_y = self.view.topleft
+            color = self.colors[self.visibility[0]]
+            self.surface.set_clip(pygame.Rect((0, 0), self.view.size))
+            self.layer.blit(self.surface, self.maze, self.cell_size, color, self.view, self.view.topleft)
+            for image, (x, y) in sprites:
+                self.surface.blit(image, (x - offset_x, y - offset_y))
+            self.surface.set_clip(None)
+        else:
+            self.mark_rect(self.view)
+            self._redraw(self._dirty_runs(), sprites)
+        return None
+
+
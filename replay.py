@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import time
+
+import pygame
+
+from profiler import Histogram, profiler
+
+RECORDING_VERSION = 1
+
+
+def encode_event(event):
+    if event.type == pygame.KEYDOWN:
+        return {"type": "key", "key": event.key, "unicode": event.unicode}
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return {"type": "click", "pos": list(event.pos), "button": event.button}
+    if event.type == pygame.QUIT:
+        return {"type": "quit"}
+    return None
+
+
+def decode_event(entry):
+    if entry["type"] == "key":
+        return pygame.event.Event(pygame.KEYDOWN, key=entry["key"], unicode=entry["unicode"], mod=0)
+    if entry["type"] == "click":
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=tuple(entry["pos"]), button=entry["button"])
+    return pygame.event.Event(pygame.QUIT)
+
+
+def fingerprint(state):
+    return {"level": state.level, "player": list(state.player), "attempts": state.attempts,
+            "hints": state.hints, "reveals": state.reveals, "over": state.over}
+
+
+class LiveSession:
+    seed = None
+
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+
+    def start(self):
+        pass
+
+    def events(self):
+        return pygame.event.get()
+
+    def tick(self, fps):
+        return self.clock.tick(fps)
+
+    def finish(self, state):
+        pass
+
+
+class RecordingSession(LiveSession):
+    def __init__(self, path, seed=None):
+        super().__init__()
+        self.path = path
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.frame = 0
+        self.elapsed = 0
+        self.ticks = []
+        self.inputs = []
+
+    def events(self):
+        events = pygame.event.get()
+        for event in events:
+            entry = encode_event(event)
+            if entry is not None:
+                entry["frame"] = self.frame
+                entry["time_ms"] = self.elapsed
+                self.inputs.append(entry)
+        return events
+
+    def tick(self, fps):
+        dt = self.clock.tick(fps)
+        self.ticks.append(dt)
+        self.elapsed += dt
+        self.frame += 1
+        return dt
+
+    def finish(self, state):
+        recording = {
+            "version": RECORDING_VERSION,
+            "seed": self.seed,
+            "level_pack": os.environ.get("MAZE_LEVEL_PACK"),
+            "ticks": self.ticks,
+            "events": self.inputs,
+            "final": fingerprint(state),
+        }
+        with open(self.path, "w") as f:
+            json.dump(recording, f)
+
+
+class ReplaySession:
+    def __init__(self, recording, realtime=False):
+        if recording.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {recording.get('version')}")
+        self.seed = recording["seed"]
+        self.ticks = recording["ticks"]
+        self.inputs = {}
+        for entry in recording["events"]:
+            self.inputs.setdefault(entry["frame"], []).append(entry)
+        self.clock = pygame.time.Clock() if realtime else None
+        self.frame = 0
+        self.frame_times = Histogram()
+        self.started = self.frame_start = 0.0
+        self.elapsed = 0.0
+        self.final = None
+        self.cue_latency = None
+
+    def start(self):
+        profiler.histograms.pop("cue_latency", None)
+        self.started = self.frame_start = time.perf_counter()
+
+    def events(self):
+        pygame.event.get()
+        if self.frame >= len(self.ticks):
+            return [pygame.event.Event(pygame.QUIT)]
+        return [decode_event(entry) for entry in self.inputs.get(self.frame, ())]
+
+    def tick(self, fps):
+        self.frame_times.add(time.perf_counter() - self.frame_start)
+        if self.clock is not None:
+            self.clock.tick(fps)
+        dt = self.ticks[self.frame] if self.frame < len(self.ticks) else 1000 // fps
+        self.frame += 1
+        self.frame_start = time.perf_counter()
+        return dt
+
+    def finish(self, state):
+        self.elapsed = time.perf_counter() - self.started
+        self.final = fingerprint(state)
+        self.cue_latency = profiler.histograms.get("cue_latency")
+
+
+def load_recording(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def use_dummy_drivers():
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def front_end():
+    return importlib.import_module("14")
+
+
+def replay(path, realtime=False, verbose=False):
+    recording = load_recording(path)
+    session = ReplaySession(recording, realtime)
+    game = front_end()
+    game.LEVEL_PACK = recording.get("level_pack")
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        game.main(session)
+    return session, session.final == recording["final"]
+
+
+def report(path, session, matched):
+    summary = session.frame_times.summary()
+    print(f"{path}: {session.frame:,} frames in {session.elapsed * 1000:,.1f} ms "
+          f"({session.frame / session.elapsed:,.0f} frames/sec)")
+    print(f"  frame  mean {summary['mean_ms']:.3f}  p50 {summary['p50_ms']:.3f}  p95 {summary['p95_ms']:.3f}  "
+          f"p99 {summary['p99_ms']:.3f}  max {summary['max_ms']:.3f} ms")
+    if session.cue_latency is not None:
+        cues = session.cue_latency.summary()
+        print(f"  cue    mean {cues['mean_ms']:.3f}  p50 {cues['p50_ms']:.3f}  p95 {cues['p95_ms']:.3f}  "
+              f"p99 {cues['p99_ms']:.3f}  max {cues['max_ms']:.3f} ms over {session.cue_latency.count:,} hints")
+    if not matched:
+        print(f"  DIVERGED: ended at {session.final}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay play sessions for performance regression runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="play a session and save its seed and input log")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--seed", type=int, default=None)
+
+    run_parser = subparsers.add_parser("run", help="replay recorded sessions and report frame times")
+    run_parser.add_argument("paths", nargs="+")
+    run_parser.add_argument("--realtime", action="store_true", help="pace frames at 30 fps instead of uncapped")
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--verbose", action="store_true", help="show the game's console output")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        session = RecordingSession(args.path, args.seed)
+        front_end().main(session)
+        print(f"recorded {session.frame:,} frames and {len(session.inputs):,} events "
+              f"with seed {session.seed} into {args.path}")
+        return
+
+    use_dummy_drivers()
+    diverged = 0
+    for _ in range(args.repeat):
+        for path in args.paths:
+            session, matched = replay(path, args.realtime, args.verbose)
+            report(path, session, matched)
+            diverged += not matched
+    if diverged:
+        raise SystemExit(f"{diverged} replay(s) diverged from their recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import heapq
+
+
+class Timer:
+    __slots__ = ('due', 'callback', 'cancelled')
+
+    def __init__(self, due, callback):
+        self.due = due
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Task:
+    __slots__ = ('generator', 'on_done', 'wake', 'done', 'result')
+
+    def __init__(self, generator, on_done, wake):
+        self.generator = generator
+        self.on_done = on_done
+        self.wake = wake
+        self.done = False
+        self.result = None
+
+    def cancel(self):
+        self.generator.close()
+        self.done = True
+
+
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+        self.tasks = []
+        self._sequence = 0
+
+    @property
+    def busy(self):
+        return bool(self.tasks)
+
+    def after(self, delay, callback):
+        timer = Timer(self.now + delay, callback)
+        self._sequence += 1
+        heapq.heappush(self.timers, (timer.due, self._sequence, timer))
+        return timer
+
+    def spawn(self, generator, on_done=None):
+        task = Task(generator, on_done, self.now)
+        self.tasks.append(task)
+        return task
+
+    def tween(self, duration, on_update, on_done=None):
+        def run():
+            start = self.now
+            while True:
+                progress = min(1.0, (self.now - start) / duration) if duration > 0 else 1.0
+                on_update(progress)
+                if progress >= 1.0:
+                    return
+                yield None
+
+        return self.spawn(run(), on_done)
+
+    def cancel_all(self):
+        for _, _, timer in self.timers:
+            timer.cancel()
+        self.timers = []
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    def tick(self, dt):
+        self.now += dt
+        now = self.now
+
+        timers = self.timers
+        while timers and timers[0][0] <= now:
+            timer = heapq.heappop(timers)[2]
+            if not timer.cancelled:
+                timer.callback()
+
+        if not self.tasks:
+            return
+        for task in list(self.tasks):
+            if task.done or task.wake > now:
+                continue
+            try:
+                delay = next(task.generator)
+            except StopIteration as stop:
+                task.done = True
+                task.result = stop.value
+                if task.on_done is not None:
+                    task.on_done(task.result)
+            else:
+                task.wake = now + (delay or 0.0)
+        self.tasks = [task for task in self.tasks if not task.done]
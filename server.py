@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis import DistanceField
+from compiler import DIRECTIONS, parse_arrow_key_input
+from game import FINAL_LEVEL, GameState, build_level
+from maze import Maze
+from profiler import Histogram
+
+HOST = "127.0.0.1"
+PORT = 7878
+MAX_LINE = 4096
+# Replies stay well under this: messages are coalesced and capped, mazes are at most 11x11.
+MAX_REPLY = 1 << 16
+MAX_MESSAGES = 16
+# Parsing and playing a short loop-free command is cheaper than the round trip to a worker process.
+INLINE_COMMAND_LENGTH = 64
+ARROWS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+
+def new_game(seed):
+    return GameState(seed=seed)
+
+
+def play_step(state, command):
+    messages = []
+    state.log = messages.append
+    outcome = state.step(command)
+    state.log = None
+    return state, outcome, messages
+
+
+class Session:
+    def __init__(self, state, pool):
+        self.state = state
+        self.pool = pool
+        self.messages = []
+        self.dropped = 0
+        self.upcoming = None
+        self.prepared = None
+        self.attach(state)
+        self.prefetch()
+
+    def attach(self, state):
+        self.state = state
+        state.log = self.log
+        state.loader = self.load
+
+    def log(self, message):
+        if self.messages and self.messages[-1][0] == message:
+            self.messages[-1][1] += 1
+        elif len(self.messages) < MAX_MESSAGES:
+            self.messages.append([message, 1])
+        else:
+            self.dropped += 1
+
+    def load(self, number, seed):
+        if self.upcoming == (number, seed) and self.prepared is not None and self.prepared.done():
+            return self.prepared.result()
+        return build_level(number, seed)
+
+    def prefetch(self):
+        self.upcoming = self.prepared = None
+        if self.state.level < FINAL_LEVEL:
+            self.upcoming = self.state.upcoming()
+            self.prepared = asyncio.get_running_loop().run_in_executor(self.pool, build_level, *self.upcoming)
+
+    def describe(self, **fields):
+        state = self.state
+        fields.update(level=state.level, rows=state.maze.rows, cols=state.maze.cols, player=state.player,
+                      end=state.end, red=state.red, green=state.green, hints=state.hints,
+                      reveals=state.reveals, attempts=state.attempts, over=state.over)
+        if self.messages:
+            fields["messages"] = [message if count == 1 else f"{message} (x{count})"
+                                  for message, count in self.messages]
+            if self.dropped:
+                fields["messages"].append(f"... {self.dropped} more")
+            self.messages.clear()
+            self.dropped = 0
+        return fields
+
+    async def move(self, command):
+        if self.prepared is not None:
+            await self.prepared
+        level = self.state.level
+        if len(command) > INLINE_COMMAND_LENGTH or "(" in command:
+            outcome = await self.offload(command)
+        else:
+            outcome = self.state.step(command)
+        if self.state.level != level:
+            self.prefetch()
+        return self.describe(outcome=outcome)
+
+    async def offload(self, command):
+        state = self.state
+        state.log = None
+        state.loader = build_level
+        try:
+            state, outcome, messages = await asyncio.get_running_loop().run_in_executor(
+                self.pool, play_step, state, command)
+        finally:
+            self.attach(state)
+        for message in messages:
+            self.log(message)
+        return outcome
+
+    def hint(self, token):
+        try:
+            direction = parse_arrow_key_input(token.upper())
+        except ValueError as e:
+            return {"error": str(e)}
+        return self.describe(hint=self.state.use_hint(direction))
+
+    def reveal(self):
+        if not self.state.use_reveal():
+            return self.describe(walls=None)
+        return self.describe(walls=bytes(self.state.maze.cells).hex())
+
+    async def handle(self, line):
+        verb, _, argument = line.strip().partition(" ")
+        verb = verb.upper()
+        if verb == "MOVE":
+            return await self.move(argument)
+        if verb == "HINT":
+            return self.hint(argument)
+        if verb == "REVEAL":
+            return self.reveal()
+        if verb == "STATE":
+            return self.describe()
+        return {"error": f"Unknown request: {verb}"}
+
+
+async def send(writer, reply):
+    writer.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+async def serve_connection(reader, writer, pool):
+    try:
+        state = await asyncio.get_running_loop().run_in_executor(pool, new_game, random.getrandbits(32))
+        session = Session(state, pool)
+        await send(writer, session.describe())
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                await send(writer, {"error": f"Request longer than {MAX_LINE} bytes"})
+                break
+            if not line or line.strip().upper() == b"QUIT":
+                break
+            try:
+                reply = await session.handle(line.decode(errors="replace"))
+            except RecursionError:
+                reply = {"error": "Command nested too deeply"}
+            await send(writer, reply)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, workers):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        server = await asyncio.start_server(lambda reader, writer: serve_connection(reader, writer, pool),
+                                            host, port, limit=MAX_LINE)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"listening on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+async def request(reader, writer, line, latencies):
+    start = time.perf_counter()
+    writer.write(line.encode() + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    latencies.add(time.perf_counter() - start)
+    return reply
+
+
+def solve(reply):
+    maze = Maze(reply["rows"], reply["cols"], bytearray.fromhex(reply["walls"]))
+    return DistanceField(maze, tuple(reply["end"])).command(*reply["player"])
+
+
+async def play(host, port, rng, latencies, max_requests):
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_REPLY)
+    reply = json.loads(await reader.readline())
+    for _ in range(max_requests):
+        if reply["over"]:
+            break
+        if reply.get("walls"):
+            command = solve(reply)
+        elif reply["reveals"] and rng.random() < 0.5:
+            reply = await request(reader, writer, "REVEAL", latencies)
+            continue
+        elif reply["hints"] and rng.random() < 0.2:
+            reply = await request(reader, writer, f"HINT {rng.choice(ARROWS)}", latencies)
+            continue
+        else:
+            command = "".join(f"{rng.choice(tuple(DIRECTIONS))}{rng.randint(1, 3)}" for _ in range(rng.randint(1, 4)))
+        reply = await request(reader, writer, f"MOVE {command}", latencies)
+    writer.write(b"QUIT\n")
+    await writer.drain()
+    writer.close()
+    return reply
+
+
+async def load_test(host, port, sessions, concurrency, max_requests, seed):
+    rng = random.Random(seed)
+    latencies = Histogram()
+    outcomes = {}
+    levels = []
+    remaining = iter(range(sessions))
+
+    async def player():
+        for _ in remaining:
+            reply = await play(host, port, random.Random(rng.getrandbits(32)), latencies, max_requests)
+            outcome = reply.get("outcome") if reply["over"] else "unfinished"
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            levels.append(reply["level"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(player() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, outcomes, sum(levels) / max(len(levels), 1)
+
+
+def spawn_server(workers):
+    command = [sys.executable, __file__, "serve", "--port", "0"]
+    if workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    host, port = process.stdout.readline().split()[-1].rsplit(":", 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host concurrent maze sessions over a line protocol")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="accept sessions on a local TCP port")
+    serve_parser.add_argument("--host", default=HOST)
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    serve_parser.add_argument("--workers", type=int, default=None)
+
+    load_parser = subparsers.add_parser("load", help="play many sessions against a server and report latency")
+    load_parser.add_argument("--host", default=HOST)
+    load_parser.add_argument("--port", type=int, default=PORT)
+    load_parser.add_argument("--spawn", action="store_true", help="start a server in a subprocess first")
+    load_parser.add_argument("--workers", type=int, default=None)
+    load_parser.add_argument("--sessions", type=int, default=200)
+    load_parser.add_argument("--concurrency", type=int, default=50)
+    load_parser.add_argument("--max-requests", type=int, default=200)
+    load_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.workers))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    process = None
+    if args.spawn:
+        process, args.host, args.port = spawn_server(args.workers)
+    try:
+        elapsed, latencies, outcomes, mean_level = asyncio.run(load_test(args.host, args.port, args.sessions, args.concurrency,
+                                                             args.max_requests, args.seed))
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGINT)
+            process.wait()
+
+    summary = latencies.summary()
+    print(f"{args.sessions} sessions, {args.concurrency} concurrent, {latencies.count:,} requests, "
+          f"outcomes {dict(sorted(outcomes.items()))}, mean final level {mean_level:.1f}")
+    print(f"sessions      {elapsed * 1000:10.1f} ms  {args.sessions / elapsed:12,.0f} sessions/sec")
+    print(f"requests      {elapsed * 1000:10.1f} ms  {latencies.count / elapsed:12,.0f} requests/sec")
+    print(f"latency       p50 {summary['p50_ms']:.3f}  p95 {summary['p95_ms']:.3f}  "
+          f"p99 {summary['p99_ms']:.3f}  max {summary['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
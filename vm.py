@@ -0,0 +1,128 @@
+from array import array
+from functools import lru_cache
+
+from analysis import RunLengths
+from compiler import (PARSE_CACHE_SIZE, CommandSyntaxError, inline_single_repeats, optimize_ir, parse_program,
+                      remove_zero_moves)
+
+OP_HALT = 0
+OP_NORTH = 1
+OP_SOUTH = 2
+OP_EAST = 3
+OP_WEST = 4
+OP_LOOP = 5
+OP_NEXT = 6
+
+MOVE_OPCODES = {'W': OP_NORTH, 'S': OP_SOUTH, 'D': OP_EAST, 'A': OP_WEST}
+OPCODE_NAMES = {OP_HALT: "HALT", OP_NORTH: "NORTH", OP_SOUTH: "SOUTH", OP_EAST: "EAST", OP_WEST: "WEST",
+                OP_LOOP: "LOOP", OP_NEXT: "NEXT"}
+
+DEFAULT_BUDGET = 100_000
+COMPILE_PASSES = (remove_zero_moves, inline_single_repeats)
+
+
+def emit(code, ir_list):
+    for instruction in ir_list:
+        if instruction.command == "MOVE":
+            if instruction.steps > 0:
+                code.extend((MOVE_OPCODES[instruction.direction], instruction.steps))
+        elif instruction.command == "REPEAT":
+            if instruction.steps <= 0 or not instruction.body:
+                continue
+            code.extend((OP_LOOP, instruction.steps))
+            body_start = len(code)
+            emit(code, instruction.body)
+            if len(code) == body_start:
+                del code[-2:]
+            else:
+                code.extend((OP_NEXT, body_start))
+
+
+def compile_ir(ir_list):
+    code = array('l')
+    emit(code, ir_list)
+    code.extend((OP_HALT, 0))
+    return code
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def compile_program(command, passes=COMPILE_PASSES):
+    try:
+        ir_list = list(parse_program(command))
+    except CommandSyntaxError:
+        return None
+    return compile_ir(optimize_ir(ir_list, passes=passes, dump=False))
+
+
+def disassemble(code):
+    return [f"{pc:4d} {OPCODE_NAMES[code[pc]]} {code[pc + 1]}" for pc in range(0, len(code), 2)]
+
+
+class VM:
+    def __init__(self, maze, runs=None):
+        self.maze = maze
+        self.runs = runs if runs is not None else RunLengths(maze)
+        self.tables = (self.runs.runs['N'], self.runs.runs['S'], self.runs.runs['E'], self.runs.runs['W'],
+                       self.runs.cols)
+
+    def run(self, code, x, y, budget=DEFAULT_BUDGET):
+        north, south, east, west, cols = self.tables
+        counters = []
+        wall_hits = 0
+        executed = 0
+        pc = 0
+
+        while executed < budget:
+            op = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            executed += 1
+
+            if op == OP_EAST:
+                run = east[y * cols + x]
+                if arg > run:
+                    x += run
+                    wall_hits += 1
+                else:
+                    x += arg
+            elif op == OP_WEST:
+                run = west[y * cols + x]
+                if arg > run:
+                    x -= run
+                    wall_hits += 1
+                else:
+                    x -= arg
+            elif op == OP_SOUTH:
+                run = south[y * cols + x]
+                if arg > run:
+                    y += run
+                    wall_hits += 1
+                else:
+                    y += arg
+            elif op == OP_NORTH:
+                run = north[y * cols + x]
+                if arg > run:
+                    y -= run
+                    wall_hits += 1
+                else:
+                    y -= arg
+            elif op == OP_NEXT:
+                loop = counters[-1]
+                remaining = loop[0] - 1
+                if not remaining:
+                    counters.pop()
+                elif x == loop[1] and y == loop[2]:
+                    wall_hits += (wall_hits - loop[3]) * remaining
+                    counters.pop()
+                else:
+                    loop[0] = remaining
+                    loop[1] = x
+                    loop[2] = y
+                    loop[3] = wall_hits
+                    pc = arg
+            elif op == OP_LOOP:
+                counters.append([arg, x, y, wall_hits])
+            else:
+                return x, y, wall_hits, executed, True
+
+        return x, y, wall_hits, executed, False